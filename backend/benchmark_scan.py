@@ -0,0 +1,347 @@
+"""
+Scan pipeline benchmark - replays recorded frames through the YOLO scan path
+
+Measures, for 1..N concurrent simulated phones:
+  - detect_realtime directly (decode, batching, motion gate, post-processing)
+  - the /ws/scan WebSocket handler end to end (binary frames over a local uvicorn)
+and reports p50/p95/p99 per-frame latency, frames per second, and memory per
+scan session. Without model weights a stand-in model is used, so the numbers
+track the pipeline around inference rather than the network itself.
+
+Usage:
+    python benchmark_scan.py [frames_dir] [--frames 60] [--phones 1,2,4,8]
+                             [--weights yolov8n.pt] [--stand-in] [--skip-ws]
+                             [--output results.json]
+
+Example:
+    python benchmark_scan.py ./recordings/apartment1 --phones 1,4,8
+    python benchmark_scan.py --stand-in --output before.json   # compare runs for regressions
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import contextlib
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+# ============================================================================
+# Stand-in model (ultralytics Results-compatible, no weights needed)
+# ============================================================================
+
+# COCO ids of objects a property scan typically sees
+ROOM_OBJECT_IDS = [56, 57, 58, 59, 60, 61, 62, 63, 68, 69, 71, 72, 73, 75]
+
+
+class _Array:
+    """Mimics a torch tensor's .cpu().numpy()"""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class _Boxes:
+    def __init__(self, cls, conf, xyxy):
+        self.cls, self.conf, self.xyxy = _Array(cls), _Array(conf), _Array(xyxy)
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class StandInModel:
+    """
+    Deterministic detector with a fixed per-batch and per-image CPU cost
+
+    Objects are derived from the image content (coarse grid brightness), so
+    identical frames give identical detections and moving the camera changes them.
+    """
+
+    def __init__(self, model_path: str = None, task: str = None, batch_ms: float = 8.0, image_ms: float = 4.0):
+        self.names = {i: name for i, name in enumerate(COCO_NAMES)}
+        self.batch_ms = batch_ms
+        self.image_ms = image_ms
+
+    def _spin(self, ms: float):
+        # Busy CPU work (holds the GIL like real pre/post-processing would)
+        end = time.perf_counter() + ms / 1000
+        while time.perf_counter() < end:
+            pass
+
+    def __call__(self, images, conf: float = 0.25, imgsz: int = 640, verbose: bool = False):
+        self._spin(self.batch_ms)
+        results = []
+
+        for image in images:
+            self._spin(self.image_ms)
+            h, w = image.shape[:2]
+            cells = cv2.resize(image, (4, 3), interpolation=cv2.INTER_AREA).mean(axis=2)
+
+            cls, scores, boxes = [], [], []
+            for (row, col), value in np.ndenumerate(cells):
+                score = value / 255
+                if score >= conf:
+                    cls.append(ROOM_OBJECT_IDS[(row * 4 + col + int(value) // 32) % len(ROOM_OBJECT_IDS)])
+                    scores.append(score)
+                    boxes.append([col * w / 4, row * h / 3, (col + 1) * w / 4, (row + 1) * h / 3])
+
+            results.append(_Result(_Boxes(
+                np.array(cls, np.float32), np.array(scores, np.float32),
+                np.array(boxes, np.float32).reshape(-1, 4)
+            )))
+
+        return results
+
+
+COCO_NAMES = [
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
+    "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat", "dog",
+    "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella",
+    "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball", "kite",
+    "baseball bat", "baseball glove", "skateboard", "surfboard", "tennis racket", "bottle",
+    "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple", "sandwich", "orange",
+    "broccoli", "carrot", "hot dog", "pizza", "donut", "cake", "chair", "couch", "potted plant",
+    "bed", "dining table", "toilet", "tv", "laptop", "mouse", "remote", "keyboard", "cell phone",
+    "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors",
+    "teddy bear", "hair drier", "toothbrush",
+]
+
+
+# ============================================================================
+# Frames and stats
+# ============================================================================
+
+def load_frames(frames_dir: str, limit: int):
+    """Recorded JPEG frames in name order, or a synthetic slow pan if no directory is given"""
+    if frames_dir:
+        paths = sorted(
+            p for p in Path(frames_dir).iterdir() if p.suffix.lower() in (".jpg", ".jpeg")
+        )[:limit]
+        if not paths:
+            sys.exit(f"❌ No .jpg frames in {frames_dir}")
+        return [p.read_bytes() for p in paths]
+
+    print("ℹ️  No frames directory - using a synthetic 1280x720 camera pan")
+    rng = np.random.default_rng(0)
+    scene = cv2.resize(rng.integers(0, 255, (40, 160, 3), dtype=np.uint8), (3840, 720))
+    frames = []
+    for i in range(limit):
+        # Hold still for a few frames, then pan (like a phone walking a room)
+        x = (i // 4) * 96 % (scene.shape[1] - 1280)
+        frames.append(cv2.imencode(".jpg", scene[:, x:x + 1280], [cv2.IMWRITE_JPEG_QUALITY, 80])[1].tobytes())
+    return frames
+
+
+def summarize(latencies_ms, elapsed_s, frames):
+    values = np.array(latencies_ms)
+    return {
+        "frames": frames,
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "fps": round(frames / elapsed_s, 1),
+    }
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+async def bench_detect(service, frames, total, phones):
+    """Each phone replays the frames through detect_realtime on its own session"""
+    latencies = []
+
+    async def phone(index):
+        session_id = f"bench-direct-{phones}-{index}"
+        for i in range(total):
+            start = time.perf_counter()
+            await service.detect_realtime(frames[(i + index) % len(frames)], session_id)
+            latencies.append((time.perf_counter() - start) * 1000)
+        service.delete_session(session_id)
+
+    before = dict(service.gate_stats)
+    start = time.perf_counter()
+    await asyncio.gather(*[phone(i) for i in range(phones)])
+    elapsed = time.perf_counter() - start
+
+    result = summarize(latencies, elapsed, total * phones)
+    gated = service.gate_stats["frames"] - before["frames"]
+    skipped = service.gate_stats["skipped"] - before["skipped"]
+    result["skip_rate"] = round(skipped / gated, 3) if gated else 0.0
+    return result
+
+
+async def bench_websocket(url, frames, total, phones, header):
+    """Each phone streams binary frames to /ws/scan and waits for each detection"""
+    import websockets
+
+    latencies = []
+
+    async def phone(index):
+        async with websockets.connect(url, max_size=None) as ws:
+            json.loads(await ws.recv())  # connected
+            await ws.send(json.dumps({"type": "config", "drop_stale_frames": False}))
+            await ws.recv()
+
+            for i in range(total):
+                store_image = 1 if i % 6 == 5 else 0  # Photo every ~3s at 2fps, like camera_scan.html
+                start = time.perf_counter()
+                await ws.send(header.pack(i, store_image) + frames[(i + index) % len(frames)])
+                while True:
+                    message = json.loads(await ws.recv())
+                    if message.get("type") == "detection" and message.get("client_frame") == i:
+                        break
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            await ws.send(json.dumps({"type": "finalize"}))
+            while json.loads(await ws.recv()).get("type") != "finalized":
+                pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*[phone(i) for i in range(phones)])
+    return summarize(latencies, time.perf_counter() - start, total * phones)
+
+
+async def bench_session_memory(service, frames, total, sessions=20):
+    """Python heap and on-disk photo bytes per session after `total` frames each"""
+    results = [await service.detect_realtime(frame) for frame in frames[:total]]
+
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    session_ids = [service.create_session(f"bench-memory-{i}") for i in range(sessions)]
+    for session_id in session_ids:
+        for i in range(total):
+            service.add_frame_to_session(
+                session_id, results[i % len(results)],
+                store_image=i % 6 == 5, image_bytes=frames[i % len(frames)]
+            )
+    heap = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+    tracemalloc.stop()
+
+    disk = sum(
+        f.stat().st_size
+        for session_id in session_ids
+        for f in Path(service.image_dir, session_id).glob("*.jpg")
+    )
+    for session_id in session_ids:
+        service.delete_session(session_id)
+
+    return {
+        "frames_per_session": total,
+        "heap_kb_per_session": round(heap / sessions / 1024, 1),
+        "disk_kb_per_session": round(disk / sessions / 1024, 1),
+    }
+
+
+def start_server(app):
+    """Run the FastAPI app on a free local port in a background thread"""
+    import socket
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"ws://127.0.0.1:{port}/ws/scan"
+
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def print_table(title, rows, columns):
+    widths = [max(10, len(c) + 2) for c in columns]
+    print(f"\n{title}")
+    print("  " + "".join(f"{c:>{w}}" for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  " + "".join(f"{row.get(c, ''):>{w}}" for c, w in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the YOLO scan pipeline")
+    parser.add_argument("frames_dir", nargs="?", help="Directory of recorded .jpg frames (default: synthetic)")
+    parser.add_argument("--frames", type=int, default=60, help="Frames per simulated phone")
+    parser.add_argument("--phones", default="1,2,4,8", help="Concurrent phones to test")
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--stand-in", action="store_true", help="Use the stand-in model even if weights exist")
+    parser.add_argument("--skip-ws", action="store_true", help="Skip the /ws/scan benchmark")
+    parser.add_argument("--output", help="Write results as JSON (diff across runs to catch regressions)")
+    args = parser.parse_args()
+
+    phone_counts = [int(n) for n in args.phones.split(",")]
+    frames = load_frames(args.frames_dir, args.frames)
+
+    import services.yolo_service as yolo_module
+
+    stand_in = args.stand_in or not os.path.exists(args.weights)
+    if stand_in:
+        print("ℹ️  Using stand-in model (no weights) - thread executor only")
+        os.environ["YOLO_EXECUTOR"] = "thread"
+        yolo_module.YOLO = StandInModel
+
+    results = {"stand_in": stand_in, "frame_count": len(frames), "detect_realtime": [], "websocket": []}
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        service = yolo_module.YOLOService(model_path=args.weights)
+
+    async def run_direct():
+        await service.detect_realtime(frames[0])  # warm-up
+        for phones in phone_counts:
+            results["detect_realtime"].append({"phones": phones, **await bench_detect(service, frames, args.frames, phones)})
+        results["session_memory"] = await bench_session_memory(service, frames, args.frames)
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        asyncio.run(run_direct())
+
+    print_table("detect_realtime", results["detect_realtime"],
+                ["phones", "frames", "p50_ms", "p95_ms", "p99_ms", "fps", "skip_rate"])
+    print_table("session memory", [results["session_memory"]],
+                ["frames_per_session", "heap_kb_per_session", "disk_kb_per_session"])
+
+    if not args.skip_ws:
+        try:
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                import main as app_module
+                app_module.yolo_service = service
+                server, url = start_server(app_module.app)
+
+                async def run_ws():
+                    for phones in phone_counts:
+                        results["websocket"].append({"phones": phones, **await bench_websocket(
+                            url, frames, args.frames, phones, app_module.SCAN_FRAME_HEADER
+                        )})
+
+                asyncio.run(run_ws())
+                server.should_exit = True
+
+            print_table("/ws/scan", results["websocket"], ["phones", "frames", "p50_ms", "p95_ms", "p99_ms", "fps"])
+        except Exception as e:
+            print(f"\n❌ /ws/scan benchmark skipped: {e}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark YOLO inference backends (PyTorch vs ONNX Runtime vs OpenVINO)
+
+Runs the same frames through YOLOService.detect_realtime for each backend and
+reports latency, throughput and whether detections match the PyTorch baseline.
+Exported models are created next to the .pt weights on first run.
+
+Usage:
+    python benchmark_yolo_backends.py [image_path ...] [--backends torch,onnx,openvino]
+                                      [--frames 50] [--concurrency 4]
+
+Example:
+    python benchmark_yolo_backends.py ./bedroom.jpg ./kitchen.jpg --frames 100
+    pip install onnxruntime openvino   # for the non-torch backends
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+
+import cv2
+import numpy as np
+
+
+def load_frames(paths):
+    """JPEG bytes for each image, or a synthetic 1280x720 frame if none given"""
+    if paths:
+        frames = []
+        for path in paths:
+            with open(path, "rb") as f:
+                frames.append(f.read())
+        return frames
+
+    print("ℹ️  No images given - using a synthetic frame (detections will be sparse)")
+    rng = np.random.default_rng(0)
+    image = cv2.resize(rng.integers(0, 255, (45, 80, 3), dtype=np.uint8), (1280, 720))
+    return [cv2.imencode(".jpg", image)[1].tobytes()]
+
+
+async def run_backend(backend, frames, total, concurrency):
+    """Load a backend and time `total` frames, sequentially then `concurrency` at a time"""
+    os.environ["YOLO_BACKEND"] = backend
+
+    # Imported lazily so YOLO_BACKEND is read per service instance
+    from services.yolo_service import YOLOService
+
+    load_start = time.perf_counter()
+    service = YOLOService(model_path="yolov8n.pt")
+    load_time = time.perf_counter() - load_start
+
+    # Warm-up (first call builds kernels / allocates buffers)
+    for frame in frames:
+        await service.detect_realtime(frame)
+
+    latencies = []
+    for i in range(total):
+        start = time.perf_counter()
+        await service.detect_realtime(frames[i % len(frames)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for offset in range(0, total, concurrency):
+        await asyncio.gather(*[
+            service.detect_realtime(frames[(offset + j) % len(frames)])
+            for j in range(min(concurrency, total - offset))
+        ])
+    concurrent_fps = total / (time.perf_counter() - start)
+
+    detections = [await service.detect_realtime(frame) for frame in frames]
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "load_s": load_time,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "fps": 1000 / statistics.mean(latencies),
+        "concurrent_fps": concurrent_fps,
+        "detections": detections,
+    }
+
+
+def same_contract(result, baseline):
+    """Same detected classes (with counts), amenities and room type as the baseline"""
+    return all(
+        Counter(obj["class"] for obj in r["objects"]) == Counter(obj["class"] for obj in b["objects"])
+        and r["amenities"] == b["amenities"]
+        and r["room_type"] == b["room_type"]
+        for r, b in zip(result["detections"], baseline["detections"])
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark YOLO inference backends")
+    parser.add_argument("images", nargs="*", help="JPEG images to run (default: synthetic frame)")
+    parser.add_argument("--backends", default="torch,onnx,openvino")
+    parser.add_argument("--frames", type=int, default=50, help="Frames per measurement")
+    parser.add_argument("--concurrency", type=int, default=4, help="Frames in flight for the throughput run")
+    args = parser.parse_args()
+
+    frames = load_frames(args.images)
+    results = []
+
+    for backend in args.backends.split(","):
+        print(f"\n🔄 Benchmarking {backend}...")
+        try:
+            results.append(await run_backend(backend, frames, args.frames, args.concurrency))
+        except Exception as e:
+            print(f"❌ {backend} unavailable: {e}")
+
+    if not results:
+        sys.exit(1)
+
+    baseline = results[0]
+    print("\n" + "=" * 78)
+    print(f"{'backend':<10} {'load s':>7} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'fps':>6} {'fps@' + str(args.concurrency):>7}  same output")
+    print("=" * 78)
+    for r in results:
+        match = "baseline" if r is baseline else ("✓" if same_contract(r, baseline) else "✗ differs")
+        print(f"{r['backend']:<10} {r['load_s']:>7.1f} {r['mean_ms']:>8.1f} {r['p50_ms']:>7.1f} "
+              f"{r['p95_ms']:>7.1f} {r['fps']:>6.1f} {r['concurrent_fps']:>7.1f}  {match}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
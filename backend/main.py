@@ -30,6 +30,16 @@ import os
 import httpx
 from dotenv import load_dotenv
 import base64
+import asyncio
+import json
+import struct
+from collections import deque
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
 
 # Import our modules
 # from services.search_service import SearchService  # Placeholder service
@@ -51,6 +61,7 @@ from services.elastic_agent_builder_service import ElasticAgentBuilderService
 # Fetch.ai agents are separate processes - see agents/fetch_agents/
 from utils.elastic_client import ElasticClient
 from utils.supabase_client import SupabaseClient
+from utils.session_store import get_session_store
 # from monitoring.arize_logger import ArizeLogger  # Placeholder service
 
 load_dotenv()
@@ -1292,6 +1303,82 @@ async def vapi_get_listing_context(listing_id: str):
 # REAL-TIME YOLO DETECTION (WebSocket)
 # ============================================================================
 
+SCAN_DROP_STALE_FRAMES = os.getenv("SCAN_DROP_STALE_FRAMES", "true").lower() == "true"
+
+# Per-connection caps on frames waiting for inference: with this many unflagged
+# (or store_image) frames queued, the server stops reading the socket until the
+# processor takes one, so the phone is slowed down over TCP instead of buffered
+SCAN_MAX_PENDING_FRAMES = int(os.getenv("SCAN_MAX_PENDING_FRAMES", "8"))
+SCAN_MAX_PENDING_PHOTOS = int(os.getenv("SCAN_MAX_PENDING_PHOTOS", "4"))
+
+# Binary /ws/scan frames: header (frame number, flags) then raw JPEG bytes
+SCAN_FRAME_HEADER = struct.Struct("!IB")
+SCAN_FLAG_STORE_IMAGE = 0x01
+
+# Detection fields resent in delta mode only when they change (objects and
+# amenities are sent as added/removed entries; frame counters are always sent)
+SCAN_DELTA_FIELDS = ("success", "error", "reused", "room_type", "guidance", "stats", "tracked_room")
+
+# Max pixel shift of any bbox edge before an object counts as moved in delta mode
+SCAN_DELTA_BBOX_TOLERANCE = int(os.getenv("SCAN_DELTA_BBOX_TOLERANCE", "16"))
+
+
+def object_delta(previous: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> tuple:
+    """
+    Match detected objects against the ones the client already has
+
+    An object is unchanged if a previous object of the same class has every
+    bbox edge within SCAN_DELTA_BBOX_TOLERANCE (confidence is ignored); the
+    client keeps its copy of it. Returns (added, removed, objects as the client
+    now has them).
+    """
+    unmatched = list(previous)
+    kept, added = [], []
+
+    for obj in current:
+        match = next((
+            candidate for candidate in unmatched
+            if candidate["class"] == obj["class"]
+            and max(abs(a - b) for a, b in zip(candidate["bbox"], obj["bbox"])) <= SCAN_DELTA_BBOX_TOLERANCE
+        ), None)
+
+        if match is None:
+            added.append(obj)
+        else:
+            unmatched.remove(match)
+            kept.append(match)
+
+    return added, unmatched, kept + added
+
+
+def detection_delta(previous: Dict[str, Any], current: Dict[str, Any]) -> tuple:
+    """
+    Fields of a detection message that differ from what the client last received
+
+    Returns (delta, detection as the client now has it) - the second is the
+    baseline for the next delta, so objects within tolerance never drift.
+    """
+    delta = {
+        field: current.get(field) for field in SCAN_DELTA_FIELDS
+        if current.get(field) != previous.get(field)
+    }
+
+    added, removed, objects = object_delta(previous.get("objects", []), current.get("objects", []))
+    if added:
+        delta["objects_added"] = added
+    if removed:
+        delta["objects_removed"] = removed
+
+    previous_amenities = set(previous.get("amenities", []))
+    current_amenities = set(current.get("amenities", []))
+    if current_amenities - previous_amenities:
+        delta["amenities_added"] = sorted(current_amenities - previous_amenities)
+    if previous_amenities - current_amenities:
+        delta["amenities_removed"] = sorted(previous_amenities - current_amenities)
+
+    return delta, {**current, "objects": objects}
+
+
 @app.websocket("/ws/scan")
 async def websocket_scan(websocket: WebSocket):
     """
@@ -1301,19 +1388,145 @@ async def websocket_scan(websocket: WebSocket):
 
     Protocol:
     - Client sends: {"type": "start"} to begin session
+    - Client sends: {"type": "config", "drop_stale_frames": true, "delta": true,
+                     "encoding": "msgpack"} (optional, all fields optional)
     - Client sends: {"type": "frame", "image": "base64_jpeg_data"}
-    - Server responds: {"type": "detection", "objects": [...], "amenities": [...]}
+      or a binary message: 5-byte header (uint32 big-endian frame number,
+      uint8 flags with bit 0 = store_image) followed by raw JPEG bytes
+    - Server responds: {"type": "detection", "objects": [...], "amenities": [...],
+                        "frames_received": N, "dropped_frames": N}
     - Client sends: {"type": "finalize"} to get aggregated results
+
+    Delta mode: after the first full "detection", each frame gets a
+    "detection_delta" with the frame counters plus only the fields that changed.
+    Objects come as objects_added / objects_removed (an object whose bbox moved
+    less than SCAN_DELTA_BBOX_TOLERANCE px is unchanged; removed entries are the
+    client's copies) and amenities as amenities_added / amenities_removed. With
+    encoding "msgpack" detection messages are sent as binary msgpack instead of
+    JSON text.
+
+    Backpressure: when inference is slower than the phone's send rate, only the
+    newest pending frame is kept (latest-frame-wins) so guidance never lags the
+    camera. Frames flagged store_image are never dropped. The dropped_frames
+    count in each detection lets the client lower its send rate. Memory per
+    connection is bounded even without latest-frame-wins: with
+    SCAN_MAX_PENDING_FRAMES unflagged or SCAN_MAX_PENDING_PHOTOS store_image
+    frames waiting, the server stops reading until one is processed.
     """
     await websocket.accept()
     session_id = None
     frame_count = 0
 
+    # Frames waiting for inference; None is the finalize sentinel
+    pending = deque()
+    frame_ready = asyncio.Event()
+    frame_taken = asyncio.Event()
+    drop_stale_frames = SCAN_DROP_STALE_FRAMES
+    dropped_frames = 0
+    processor = None
+
+    # Detection message format (set via config)
+    delta_mode = False
+    encoding = "json"
+    last_detection = None
+
+    async def send_detection(message: Dict[str, Any]):
+        if encoding == "msgpack":
+            await websocket.send_bytes(msgpack.packb(message))
+        else:
+            await websocket.send_json(message)
+
+    async def process_frame(frame: Dict[str, Any]):
+        nonlocal last_detection
+        store_image = frame["store_image"]
+
+        if frame.get("jpeg") is not None:
+            # Binary mode: raw JPEG bytes, decoded straight from the memoryview
+            image_bytes = frame["jpeg"]
+            image_data_uri = None
+        else:
+            image_base64 = frame["image"]
+
+            # Remove data URL prefix if present
+            image_data_uri = image_base64
+            if "," in image_base64:
+                image_base64 = image_base64.split(",")[1]
+
+            image_bytes = base64.b64decode(image_base64)
+
+        # Run YOLO detection (static views reuse the previous result)
+        result = await yolo_service.detect_realtime(image_bytes, session_id)
+
+        # Add to session (stores image only when store_image=True); returns the
+        # smoothed room, which is steadier than the per-frame room_type. Session
+        # store and disk I/O run on a worker thread, off the event loop
+        tracked_room = await asyncio.to_thread(
+            yolo_service.add_frame_to_session,
+            session_id,
+            result,
+            image_data_uri if store_image else None,
+            store_image,
+            image_bytes=image_bytes if store_image and image_data_uri is None else None
+        )
+
+        # Send results back to phone (only what changed, in delta mode)
+        counters = {
+            "frame": frame["number"],
+            "client_frame": frame.get("client_frame"),
+            "frames_received": frame_count,
+            "dropped_frames": dropped_frames,
+            "pending_frames": len(pending),
+        }
+        detection = {"tracked_room": tracked_room, **result}
+
+        if delta_mode and last_detection is not None:
+            delta, last_detection = detection_delta(last_detection, detection)
+            await send_detection({"type": "detection_delta", **counters, **delta})
+        else:
+            await send_detection({"type": "detection", **counters, "session_id": session_id, **detection})
+            last_detection = detection
+
+        # Log photo captures and periodic updates
+        if store_image:
+            session_info = await asyncio.to_thread(yolo_service.get_session, session_id)
+            print(f"📸 Photo captured! Total: {session_info['images_captured']} images, Room: {result.get('room_type')}")
+        elif frame["number"] % 20 == 0:
+            session_info = await asyncio.to_thread(yolo_service.get_session, session_id)
+            skip_rate = yolo_service.get_gate_stats(session_id)["skip_rate"]
+            print(f"🔄 Frame {frame['number']} - Amenities: {len(session_info['amenities'])}, Images: {session_info['images_captured']}, Dropped: {dropped_frames}, Skip rate: {skip_rate:.0%}")
+
+    def queue_full() -> bool:
+        photos = sum(1 for f in pending if f is not None and f["store_image"])
+        frames = sum(1 for f in pending if f is not None) - photos
+        return photos >= SCAN_MAX_PENDING_PHOTOS or frames >= SCAN_MAX_PENDING_FRAMES
+
+    async def process_frames():
+        """Run detection on pending frames in arrival order until the finalize sentinel"""
+        while True:
+            await frame_ready.wait()
+            if not pending:
+                frame_ready.clear()
+                continue
+
+            frame = pending.popleft()
+            frame_taken.set()
+            if frame is None:
+                return
+
+            try:
+                await process_frame(frame)
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                print(f"❌ Frame {frame['number']} failed: {e}")
+                await websocket.send_json({"error": str(e), "frame": frame["number"]})
+
     try:
         print("📱 Phone connected to WebSocket")
 
         # Create session
-        session_id = yolo_service.create_session()
+        session_id = await asyncio.to_thread(yolo_service.create_session)
+        processor = asyncio.create_task(process_frames())
 
         await websocket.send_json({
             "type": "connected",
@@ -1322,65 +1535,97 @@ async def websocket_scan(websocket: WebSocket):
         })
 
         while True:
-            # Receive message from phone
-            data = await websocket.receive_json()
+            # Backpressure: don't read more while either queue cap is reached
+            while not processor.done() and queue_full():
+                frame_taken.clear()
+                taken = asyncio.ensure_future(frame_taken.wait())
+                await asyncio.wait({taken, processor}, return_when=asyncio.FIRST_COMPLETED)
+                taken.cancel()
+
+            # Receive message from phone (JSON text or binary frame)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes") is not None:
+                # Binary frame: SCAN_FRAME_HEADER followed by raw JPEG bytes
+                payload = memoryview(message["bytes"])
+                if len(payload) < SCAN_FRAME_HEADER.size:
+                    await websocket.send_json({"error": "Binary frame too short"})
+                    continue
+                client_frame, flags = SCAN_FRAME_HEADER.unpack_from(payload)
+                data = {
+                    "type": "frame",
+                    "jpeg": payload[SCAN_FRAME_HEADER.size:],
+                    "client_frame": client_frame,
+                    "store_image": bool(flags & SCAN_FLAG_STORE_IMAGE),
+                }
+            else:
+                data = json.loads(message.get("text") or "{}")
 
             if data.get("type") == "frame":
                 frame_count += 1
 
-                # Decode base64 image
                 image_base64 = data.get("image", "")
-                if not image_base64:
+                jpeg = data.get("jpeg")
+                if not image_base64 and not jpeg:
                     await websocket.send_json({"error": "No image data"})
                     continue
 
                 # Check if this should be stored as a photo
                 store_image = data.get("store_image", False)
 
-                # Remove data URL prefix if present
-                image_data_uri = image_base64
-                if "," in image_base64:
-                    image_base64 = image_base64.split(",")[1]
-
-                image_bytes = base64.b64decode(image_base64)
+                # Latest frame wins: unflagged frames still waiting are skipped on
+                # every arrival (store_image frames among them are kept)
+                if drop_stale_frames:
+                    for stale in [f for f in pending if f is not None and not f["store_image"]]:
+                        pending.remove(stale)
+                        dropped_frames += 1
+
+                pending.append({
+                    "number": frame_count,
+                    "image": image_base64,
+                    "jpeg": jpeg,
+                    "client_frame": data.get("client_frame"),
+                    "store_image": store_image
+                })
 
-                # Run YOLO detection
-                result = await yolo_service.detect_realtime(image_bytes)
+                frame_ready.set()
 
-                # Add to session (stores image only when store_image=True)
-                yolo_service.add_frame_to_session(
-                    session_id,
-                    result,
-                    image_data_uri if store_image else None,
-                    store_image
-                )
+            elif data.get("type") == "config":
+                drop_stale_frames = bool(data.get("drop_stale_frames", drop_stale_frames))
+                if "delta" in data:
+                    delta_mode = bool(data["delta"])
+                    last_detection = None  # Next detection is sent in full
+                if data.get("encoding") in ("json", "msgpack"):
+                    # Fall back to JSON when msgpack isn't installed on the server
+                    encoding = data["encoding"] if MSGPACK_AVAILABLE else "json"
 
-                # Send results back to phone
                 await websocket.send_json({
-                    "type": "detection",
-                    "frame": frame_count,
-                    "session_id": session_id,
-                    **result
+                    "type": "config",
+                    "drop_stale_frames": drop_stale_frames,
+                    "delta": delta_mode,
+                    "encoding": encoding
                 })
 
-                # Log photo captures and periodic updates
-                if store_image:
-                    session_info = yolo_service.get_session(session_id)
-                    print(f"📸 Photo captured! Total: {session_info['images_captured']} images, Room: {result.get('room_type')}")
-                elif frame_count % 20 == 0:
-                    session_info = yolo_service.get_session(session_id)
-                    print(f"🔄 Frame {frame_count} - Amenities: {len(session_info['amenities'])}, Images: {session_info['images_captured']}")
-
             elif data.get("type") == "finalize":
-                # Get aggregated results
-                final_result = yolo_service.finalize_session(session_id)
+                # Let queued frames (especially stored photos) finish first
+                pending.append(None)
+                frame_ready.set()
+                await processor
+
+                # Get aggregated results (photos inline unless the client asks for URLs)
+                final_result = await asyncio.to_thread(
+                    yolo_service.finalize_session, session_id,
+                    inline_images=data.get("images") != "reference"
+                )
 
                 await websocket.send_json({
                     "type": "finalized",
                     "data": final_result
                 })
 
-                print(f"✅ Session {session_id} finalized - {frame_count} frames, {len(final_result['amenities'])} amenities")
+                print(f"✅ Session {session_id} finalized - {frame_count} frames ({dropped_frames} dropped), {len(final_result['amenities'])} amenities")
                 break
 
             elif data.get("type") == "ping":
@@ -1388,18 +1633,20 @@ async def websocket_scan(websocket: WebSocket):
                 await websocket.send_json({"type": "pong"})
 
     except WebSocketDisconnect:
-        print(f"📱 Phone disconnected after {frame_count} frames")
+        print(f"📱 Phone disconnected after {frame_count} frames ({dropped_frames} dropped)")
         if session_id:
-            yolo_service.delete_session(session_id)
+            await asyncio.to_thread(yolo_service.delete_session, session_id)
     except Exception as e:
         print(f"❌ WebSocket error: {e}")
         if session_id:
-            yolo_service.delete_session(session_id)
+            await asyncio.to_thread(yolo_service.delete_session, session_id)
         try:
             await websocket.send_json({"error": str(e)})
         except:
             pass
     finally:
+        if processor and not processor.done():
+            processor.cancel()
         try:
             await websocket.close()
         except:
@@ -1410,6 +1657,12 @@ async def websocket_scan(websocket: WebSocket):
 # SCAN SESSION ENDPOINTS
 # ============================================================================
 
+def require_scan_session_id(session_id: str):
+    """404 for anything that isn't a well-formed scan session id (never reaches the filesystem)"""
+    if not yolo_service.is_valid_session_id(session_id):
+        raise HTTPException(status_code=404, detail="Scan session not found")
+
+
 @app.get("/api/scan/session/{session_id}")
 async def get_scan_session(session_id: str):
     """
@@ -1417,15 +1670,32 @@ async def get_scan_session(session_id: str):
 
     Returns aggregated amenities, room detections, and image count
     """
+    require_scan_session_id(session_id)
+
     try:
-        session_data = yolo_service.get_session(session_id)
+        session_data = await asyncio.to_thread(yolo_service.get_session, session_id)
         return {"success": True, "data": session_data}
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@app.get("/api/scan/stats")
+async def get_scan_stats():
+    """
+    Inference stats for this worker
+
+    Returns micro-batching counters and the motion gate's skip rate (frames
+    that reused the previous detection instead of running YOLO)
+    """
+    return {
+        "success": True,
+        "batching": yolo_service.batch_stats,
+        "motion_gate": yolo_service.get_gate_stats()
+    }
+
+
 @app.post("/api/scan/finalize/{session_id}")
-async def finalize_scan_session(session_id: str):
+async def finalize_scan_session(session_id: str, images: str = "inline"):
     """
     Finalize scan session and get complete results
 
@@ -1434,13 +1704,17 @@ async def finalize_scan_session(session_id: str):
     - Room breakdown (bedrooms, bathrooms, etc.)
     - Property type inference
     - Top 20 detected objects with counts
-    - Images captured (every 10 frames with base64)
+    - Images captured (base64, or URLs to /api/scan/image with ?images=reference)
     - Summary statistics
 
     Use this data to create listing with pricing endpoint
     """
+    require_scan_session_id(session_id)
+
     try:
-        final_result = yolo_service.finalize_session(session_id)
+        final_result = await asyncio.to_thread(
+            yolo_service.finalize_session, session_id, inline_images=images != "reference"
+        )
 
         if "error" in final_result:
             raise HTTPException(status_code=404, detail=final_result["error"])
@@ -1456,8 +1730,43 @@ async def finalize_scan_session(session_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Temporary storage for scan results (cross-origin workaround)
-scan_results_cache = {}
+@app.get("/api/scan/image/{session_id}/{frame_number}")
+async def get_scan_image(session_id: str, frame_number: int):
+    """
+    Stream a captured scan photo (JPEG)
+
+    Referenced by finalize results requested with ?images=reference; available
+    until the session is deleted or expires.
+    """
+    require_scan_session_id(session_id)
+
+    path = await asyncio.to_thread(yolo_service.get_session_image_path, session_id, frame_number)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Scan image not found")
+
+    return FileResponse(path, media_type="image/jpeg")
+
+
+# Temporary storage for scan results (cross-origin workaround). Lives in the shared
+# session store so any worker can serve the retrieve call; unclaimed entries expire.
+scan_results_store = get_session_store()
+SCAN_RESULTS_TTL = float(os.getenv("SCAN_RESULTS_TTL", "1800"))
+
+
+@app.on_event("startup")
+async def start_scan_reaper():
+    """Periodically drop idle scan sessions and expired temp scan results"""
+    interval = float(os.getenv("SCAN_REAP_INTERVAL", "60"))
+
+    async def reap():
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(yolo_service.reap_idle_sessions)
+            except Exception as e:
+                print(f"❌ Scan reaper error: {e}")
+
+    asyncio.create_task(reap())
 
 @app.post("/api/scan/store-temp/{session_id}")
 async def store_temp_scan(session_id: str, scan_data: Dict[str, Any]):
@@ -1467,7 +1776,9 @@ async def store_temp_scan(session_id: str, scan_data: Dict[str, Any]):
     camera_scan.html (port 8000) can't share localStorage with frontend (port 3000),
     so we store the data here temporarily for the frontend to fetch.
     """
-    scan_results_cache[session_id] = scan_data
+    require_scan_session_id(session_id)
+
+    await asyncio.to_thread(scan_results_store.set, "scan_results", session_id, scan_data, SCAN_RESULTS_TTL)
     print(f"💾 Stored scan data for session {session_id}")
     return {"success": True, "message": "Scan data stored"}
 
@@ -1479,15 +1790,21 @@ async def retrieve_temp_scan(session_id: str):
 
     Frontend calls this with the session_id from URL params to get the scan data.
     """
-    if session_id in scan_results_cache:
-        data = scan_results_cache[session_id]
-        print(f"📤 Retrieved scan data for session {session_id}")
+    require_scan_session_id(session_id)
 
+    data = await asyncio.to_thread(scan_results_store.get, "scan_results", session_id)
+
+    if data is not None:
         # Clean up after retrieval
-        del scan_results_cache[session_id]
+        await asyncio.to_thread(scan_results_store.delete, "scan_results", session_id)
+        print(f"📤 Retrieved scan data for session {session_id}")
 
-        # Also clean up YOLO session if it still exists
-        yolo_service.delete_session(session_id)
+        # Also clean up the YOLO session - unless the results reference its photos
+        # by URL, in which case it (and its photos) expire with YOLO_SESSION_TTL
+        if any("url" in image for image in data.get("images") or []):
+            await asyncio.to_thread(yolo_service.touch_session, session_id)
+        else:
+            await asyncio.to_thread(yolo_service.delete_session, session_id)
 
         return {
             "success": True,
@@ -1496,11 +1813,11 @@ async def retrieve_temp_scan(session_id: str):
     else:
         # Try to get from YOLO service sessions
         try:
-            session_data = yolo_service.get_session(session_id)
+            session_data = await asyncio.to_thread(yolo_service.get_session, session_id)
             if "error" not in session_data:
                 # Finalize and return
-                final_result = yolo_service.finalize_session(session_id)
-                yolo_service.delete_session(session_id)
+                final_result = await asyncio.to_thread(yolo_service.finalize_session, session_id)
+                await asyncio.to_thread(yolo_service.delete_session, session_id)
                 return {
                     "success": True,
                     "data": final_result
@@ -1616,6 +1933,17 @@ async def geocode_location(location: str):
         }
 
 
+@app.get("/api/geocode/cache-stats")
+async def geocode_cache_stats():
+    """
+    Geocoding cache hit/miss counters (memory and disk tiers)
+    """
+    return {
+        "success": True,
+        "cache": await asyncio.to_thread(geocoding_service.cache_stats)
+    }
+
+
 @app.get("/phone_test.html")
 async def phone_test():
     """Serve phone camera test page (requires HTTPS for video)"""
@@ -16,6 +16,16 @@ def add_claude_search_routes(app: FastAPI):
 
     csv_search_service = CSVSearchService()
 
+    class LatLng(BaseModel):
+        """Map coordinate"""
+        lat: float
+        lng: float
+
+    class Bounds(BaseModel):
+        """Google-style map bounding box"""
+        northeast: LatLng
+        southwest: LatLng
+
     class ClaudeSearchRequest(BaseModel):
         """Request for Claude-powered CSV search"""
         query: str
@@ -23,6 +33,8 @@ def add_claude_search_routes(app: FastAPI):
         guests: Optional[int] = None
         budget: Optional[float] = None
         limit: int = 20
+        bedrooms: Optional[int] = None
+        bounds: Optional[Bounds] = None
 
     @app.post("/api/claude-search")
     async def claude_search(request: ClaudeSearchRequest):
@@ -38,7 +50,9 @@ def add_claude_search_routes(app: FastAPI):
                 location=request.location,
                 guests=request.guests,
                 budget=request.budget,
-                limit=request.limit
+                limit=request.limit,
+                bedrooms=request.bedrooms,
+                bounds=request.bounds.model_dump() if request.bounds else None
             )
 
             return {
@@ -50,6 +64,16 @@ def add_claude_search_routes(app: FastAPI):
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
+    @app.get("/api/claude-search/cache-stats")
+    async def claude_search_cache_stats():
+        """
+        Result cache hit/miss counters for Claude CSV search
+        """
+        return {
+            "success": True,
+            "cache": csv_search_service.cache_stats()
+        }
+
     @app.get("/api/listing/{listing_id}")
     async def get_listing_detail(listing_id: str):
         """
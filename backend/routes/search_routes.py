@@ -13,6 +13,18 @@ router = APIRouter()
 csv_search_service = CSVSearchService()
 
 
+class LatLng(BaseModel):
+    """Map coordinate"""
+    lat: float
+    lng: float
+
+
+class Bounds(BaseModel):
+    """Google-style map bounding box"""
+    northeast: LatLng
+    southwest: LatLng
+
+
 class ClaudeSearchRequest(BaseModel):
     """Request for Claude-powered CSV search"""
     query: str
@@ -20,6 +32,8 @@ class ClaudeSearchRequest(BaseModel):
     guests: Optional[int] = None
     budget: Optional[float] = None
     limit: int = 20
+    bedrooms: Optional[int] = None
+    bounds: Optional[Bounds] = None
 
 
 @router.post("/api/claude-search")
@@ -36,7 +50,9 @@ async def claude_search(request: ClaudeSearchRequest):
             location=request.location,
             guests=request.guests,
             budget=request.budget,
-            limit=request.limit
+            limit=request.limit,
+            bedrooms=request.bedrooms,
+            bounds=request.bounds.model_dump() if request.bounds else None
         )
 
         return {
@@ -49,6 +65,17 @@ async def claude_search(request: ClaudeSearchRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/api/claude-search/cache-stats")
+async def claude_search_cache_stats():
+    """
+    Result cache hit/miss counters for Claude CSV search
+    """
+    return {
+        "success": True,
+        "cache": csv_search_service.cache_stats()
+    }
+
+
 @router.get("/api/listing/{listing_id}")
 async def get_listing_detail(listing_id: str):
     """
@@ -0,0 +1,122 @@
+"""
+BM25 Ranker - Local lexical pre-ranking for CSV search
+
+Scores listings against the user query with Okapi BM25 over name, description
+and amenities, so only the best N candidates are sent to Claude. Each dataset
+keeps a compact inverted index (term ids into flat row/frequency arrays), so
+a query touches only the postings of its own terms.
+"""
+
+import re
+import math
+from array import array
+import numpy as np
+from collections import Counter
+from typing import List, Dict, Any
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Common words that carry no signal for matching listings
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "i", "in",
+    "is", "it", "me", "my", "near", "of", "on", "or", "the", "to", "we", "with",
+    "want", "looking", "need", "place", "stay", "find",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def listing_terms(listing: Dict[str, Any]) -> Counter:
+    """Term counts for a listing's name, description and amenities"""
+    text = " ".join([
+        listing.get("name", ""),
+        listing.get("description", ""),
+        " ".join(listing.get("amenities", [])),
+    ])
+    return Counter(tokenize(text))
+
+
+def build_postings(listings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compact inverted index over a file's listings
+
+    Returns {"term_ids": {term: id}, "offsets", "rows", "tf", "lengths"}: the
+    postings of term id t are rows[offsets[t]:offsets[t + 1]] with matching
+    term frequencies, and lengths holds each row's token count. Rows are
+    tokenized one at a time, so no per-listing Counter stays resident.
+    """
+    term_ids: Dict[str, int] = {}
+    entry_terms = array("i")
+    entry_rows = array("i")
+    entry_tf = array("H")
+    lengths = np.zeros(len(listings), dtype=np.int32)
+
+    for row, listing in enumerate(listings):
+        terms = listing_terms(listing)
+        lengths[row] = sum(terms.values())
+        for term, tf in terms.items():
+            entry_terms.append(term_ids.setdefault(term, len(term_ids)))
+            entry_rows.append(row)
+            entry_tf.append(min(tf, 65535))
+
+    term_column = np.frombuffer(entry_terms, dtype=np.int32)
+    order = np.argsort(term_column, kind="stable")  # rows stay ascending within a term
+
+    return {
+        "term_ids": term_ids,
+        "offsets": np.concatenate([[0], np.cumsum(np.bincount(term_column, minlength=len(term_ids)))]),
+        "rows": np.frombuffer(entry_rows, dtype=np.int32)[order],
+        "tf": np.frombuffer(entry_tf, dtype=np.uint16)[order],
+        "lengths": lengths,
+    }
+
+
+class BM25Ranker:
+    """Okapi BM25 scoring over per-file inverted indexes"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(
+        self,
+        query_terms: List[str],
+        postings: Dict[str, Any],
+        term_statistics: Dict[str, Any]
+    ) -> np.ndarray:
+        """
+        BM25 score of every row in one file (0 for rows matching no query term)
+
+        Args:
+            query_terms: Tokenized query
+            postings: The file's inverted index from build_postings()
+            term_statistics: {"doc_count": int, "avg_length": float, "df": {term: count}}
+                over the whole corpus being searched
+        """
+        lengths = postings["lengths"]
+        scores = np.zeros(len(lengths), dtype=np.float64)
+
+        doc_count = term_statistics["doc_count"]
+        avg_length = term_statistics["avg_length"] or 1.0
+        df = term_statistics["df"]
+
+        for term in set(query_terms):
+            term_id = postings["term_ids"].get(term)
+            if term_id is None:
+                continue
+
+            start, end = postings["offsets"][term_id], postings["offsets"][term_id + 1]
+            rows = postings["rows"][start:end]
+            tf = postings["tf"][start:end].astype(np.float64)
+            length_norm = self.k1 * (1 - self.b + self.b * lengths[rows] / avg_length)
+
+            idf = math.log(1 + (doc_count - df.get(term, 0) + 0.5) / (df.get(term, 0) + 0.5))
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + length_norm)
+
+        return scores
@@ -3,10 +3,9 @@ Conversational Search Service
 Manages multi-turn conversations to collect search parameters
 """
 
-import os
 from typing import Dict, Any, List, Optional
 import json
-from anthropic import Anthropic
+from utils.llm_client import get_claude_client
 
 class ConversationService:
     """
@@ -34,7 +33,7 @@ class ConversationService:
     ]
 
     def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = get_claude_client()
         self.model = "claude-sonnet-4-5-20250929"
 
     async def process_message(
@@ -122,7 +121,7 @@ If a parameter is mentioned but unclear, don't include it. Only include what you
 
         # Extract parameters using Claude
         try:
-            extraction_response = self.client.messages.create(
+            extraction_response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=1024,
                 messages=[{
@@ -220,7 +219,7 @@ Be conversational and friendly!
 """
 
         try:
-            followup_response = self.client.messages.create(
+            followup_response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=512,
                 messages=[{
@@ -340,7 +339,7 @@ Examples:
 Use today's date context if needed. Today is 2025-10-25.
 """
 
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model,
             max_tokens=256,
             messages=[{
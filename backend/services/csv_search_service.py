@@ -5,17 +5,20 @@ Uses Claude to intelligently match user preferences with CSV data
 """
 
 import os
-import csv
-import anthropic
+import re
 from typing import List, Dict, Any, Optional
 import json
+from services.listing_store import get_listing_store
+from services.bm25_ranker import BM25Ranker, tokenize
+from utils.ttl_cache import TTLCache
+from utils.llm_client import get_claude_client
 
 class CSVSearchService:
     """Search listings from CSV files using Claude for intelligent matching"""
 
     def __init__(self):
         api_key = os.getenv("ANTHROPIC_API_KEY")
-        self.client = anthropic.Anthropic(api_key=api_key) if api_key else None
+        self.client = get_claude_client() if api_key else None
 
         # Path to CSV datasets
         self.csv_base_path = os.path.join(
@@ -23,6 +26,23 @@ class CSVSearchService:
             "frontend", "public", "datasets"
         )
 
+        # Max listings sent to Claude when BM25 pre-ranking is disabled (most-reviewed first)
+        self.max_candidates = int(os.getenv("CSV_SEARCH_MAX_CANDIDATES", "200"))
+
+        # Candidates kept after local BM25 pre-ranking over all matches (0 disables pre-ranking)
+        self.prerank_limit = int(os.getenv("CSV_SEARCH_PRERANK_LIMIT", "40"))
+        self.ranker = BM25Ranker()
+
+        # Parsed listings stay resident; files are re-read only when their mtime changes
+        self.store = get_listing_store(self.csv_base_path)
+
+        # Ranked listing ids for repeat searches, keyed on normalized query + filters
+        self.result_cache = TTLCache(
+            max_size=int(os.getenv("CSV_SEARCH_CACHE_SIZE", "512")),
+            ttl_seconds=float(os.getenv("CSV_SEARCH_CACHE_TTL", "900"))
+        )
+        self._cached_dataset_version = None
+
         # Mapping of locations to CSV files
         self.location_csv_map = {
             "san francisco": "sf_listings.csv",
@@ -38,8 +58,8 @@ class CSVSearchService:
             "boston": "bos_listings.csv",
         }
 
-    def _load_csv_data(self, location: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Load listings from CSV file(s)"""
+    def _resolve_csv_files(self, location: Optional[str] = None) -> List[str]:
+        """Map a location to its CSV file (or all CSV files if unknown)"""
 
         csv_files = []
 
@@ -55,48 +75,7 @@ class CSVSearchService:
         if not csv_files:
             csv_files = list(set(self.location_csv_map.values()))
 
-        all_listings = []
-
-        for csv_file in csv_files:
-            csv_path = os.path.join(self.csv_base_path, csv_file)
-
-            if not os.path.exists(csv_path):
-                print(f"Warning: CSV file not found: {csv_path}")
-                continue
-
-            try:
-                with open(csv_path, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        # Extract key fields
-                        listing = {
-                            "id": row.get("id", ""),
-                            "name": row.get("name", ""),
-                            "description": row.get("description", ""),
-                            "picture_url": row.get("picture_url", ""),
-                            "host_name": row.get("host_name", ""),
-                            "host_location": row.get("host_location", ""),
-                            "host_picture_url": row.get("host_picture_url", ""),
-                            "amenities": row.get("amenities", ""),
-                            "price": row.get("price", "$0"),
-                            "property_type": row.get("property_type", ""),
-                            "room_type": row.get("room_type", ""),
-                            "accommodates": row.get("accommodates", "0"),
-                            "bedrooms": row.get("bedrooms", "0"),
-                            "beds": row.get("beds", "0"),
-                            "bathrooms_text": row.get("bathrooms_text", ""),
-                            "neighbourhood_cleansed": row.get("neighbourhood_cleansed", ""),
-                            "latitude": row.get("latitude", ""),
-                            "longitude": row.get("longitude", ""),
-                            "review_scores_rating": row.get("review_scores_rating", ""),
-                            "number_of_reviews": row.get("number_of_reviews", "0"),
-                        }
-                        all_listings.append(listing)
-
-            except Exception as e:
-                print(f"Error reading CSV {csv_file}: {e}")
-
-        return all_listings
+        return csv_files
 
     async def search_with_claude(
         self,
@@ -104,7 +83,9 @@ class CSVSearchService:
         location: Optional[str] = None,
         guests: Optional[int] = None,
         budget: Optional[float] = None,
-        limit: int = 20
+        limit: int = 20,
+        bedrooms: Optional[int] = None,
+        bounds: Optional[Dict[str, Dict[str, float]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Use Claude to intelligently search and rank listings from CSV data
@@ -115,6 +96,8 @@ class CSVSearchService:
             guests: Number of guests
             budget: Maximum price per night
             limit: Number of results to return
+            bedrooms: Minimum number of bedrooms
+            bounds: Bounding box {"northeast": {"lat", "lng"}, "southwest": {"lat", "lng"}}
 
         Returns:
             List of matched listings
@@ -124,24 +107,38 @@ class CSVSearchService:
             print("Warning: Anthropic API key not found, returning mock data")
             return self._get_mock_listings()
 
-        # Load CSV data
-        all_listings = self._load_csv_data(location)
+        csv_files = self._resolve_csv_files(location)
 
-        if not all_listings:
-            print("No listings found in CSV files")
-            return []
+        # Serve repeat searches from the result cache (dataset reloads invalidate it)
+        dataset_version = self.store.dataset_version(csv_files)
+        if dataset_version != self._cached_dataset_version:
+            self.result_cache.clear()
+            self._cached_dataset_version = dataset_version
 
-        # Filter by basic criteria first to reduce data sent to Claude
-        filtered_listings = self._basic_filter(all_listings, guests, budget)
+        cache_key = self._cache_key(
+            user_query, location, guests, budget, limit, bedrooms, bounds, dataset_version
+        )
+        cached_ids = self.result_cache.get(cache_key)
+        if cached_ids is not None:
+            return [self._format_listing(listing) for listing in self.store.lookup_ids(cached_ids)]
+
+        # Filter by basic criteria, then pre-rank every match locally with BM25
+        # so Claude only sees the best few candidates (most reviewed when the
+        # query has no usable terms or pre-ranking is disabled)
+        query_terms = tokenize(user_query)
+        if self.prerank_limit:
+            filtered_listings = self._basic_filter(
+                csv_files, guests, budget, bedrooms, bounds,
+                top_k=self.prerank_limit, query_terms=query_terms
+            )
+        else:
+            filtered_listings = self._basic_filter(
+                csv_files, guests, budget, bedrooms, bounds, top_k=self.max_candidates
+            )
 
-        # If we have too many listings, take a sample
-        if len(filtered_listings) > 200:
-            # Take top 200 based on reviews
-            filtered_listings = sorted(
-                filtered_listings,
-                key=lambda x: int(x.get("number_of_reviews", "0") or "0"),
-                reverse=True
-            )[:200]
+        if not filtered_listings:
+            print("No listings found in CSV files")
+            return []
 
         # Create a condensed version for Claude
         condensed_listings = []
@@ -155,7 +152,7 @@ class CSVSearchService:
                 "property_type": listing["property_type"],
                 "accommodates": listing["accommodates"],
                 "bedrooms": listing["bedrooms"],
-                "amenities_preview": listing["amenities"][:200] if listing["amenities"] else "",  # Truncate
+                "amenities_preview": ", ".join(listing["amenities"])[:200],  # Truncate
                 "rating": listing["review_scores_rating"],
             })
 
@@ -169,7 +166,7 @@ Budget (max per night): ${budget or "Any"}
 
 Here are {len(condensed_listings)} listings to choose from (in JSON format):
 
-{json.dumps(condensed_listings, indent=2)}
+{json.dumps(condensed_listings, separators=(",", ":"))}
 
 Please analyze these listings and return the indices of the top {limit} listings that best match the user's query, ordered from best to worst match.
 
@@ -185,7 +182,7 @@ Return ONLY a JSON array of indices (numbers), nothing else. Example: [5, 12, 3,
 
         try:
             # Call Claude
-            message = self.client.messages.create(
+            message = await self.client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=1000,
                 messages=[
@@ -200,67 +197,74 @@ Return ONLY a JSON array of indices (numbers), nothing else. Example: [5, 12, 3,
             selected_indices = json.loads(response_text)
 
             # Get the selected listings in order
-            results = []
-            for idx in selected_indices[:limit]:
-                if 0 <= idx < len(filtered_listings):
-                    results.append(self._format_listing(filtered_listings[idx]))
+            selected = [
+                filtered_listings[idx] for idx in selected_indices[:limit]
+                if 0 <= idx < len(filtered_listings)
+            ]
 
-            return results
+            self.result_cache.set(cache_key, [listing["id"] for listing in selected])
+
+            return [self._format_listing(listing) for listing in selected]
 
         except Exception as e:
             print(f"Error calling Claude for search: {e}")
             # Fallback to simple filtering
             return [self._format_listing(listing) for listing in filtered_listings[:limit]]
 
+    def _cache_key(
+        self,
+        user_query: str,
+        location: Optional[str],
+        guests: Optional[int],
+        budget: Optional[float],
+        limit: int,
+        bedrooms: Optional[int],
+        bounds: Optional[Dict[str, Dict[str, float]]],
+        dataset_version: int
+    ) -> tuple:
+        """Normalize a search into a hashable result-cache key"""
+        normalized_query = " ".join(re.findall(r"[\w$]+", user_query.lower()))
+        normalized_location = " ".join((location or "").lower().split())
+
+        return (
+            normalized_query,
+            normalized_location,
+            guests or None,
+            float(budget) if budget else None,
+            limit,
+            bedrooms or None,
+            json.dumps(bounds, sort_keys=True) if bounds else None,
+            dataset_version,
+        )
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Result cache hit/miss counters"""
+        return {**self.result_cache.stats(), "dataset_version": self._cached_dataset_version}
+
     def _basic_filter(
         self,
-        listings: List[Dict[str, Any]],
+        csv_files: List[str],
         guests: Optional[int] = None,
-        budget: Optional[float] = None
+        budget: Optional[float] = None,
+        bedrooms: Optional[int] = None,
+        bounds: Optional[Dict[str, Dict[str, float]]] = None,
+        top_k: Optional[int] = None,
+        query_terms: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
-        """Apply basic filtering before sending to Claude"""
-
-        filtered = listings
-
-        # Filter by guest capacity
-        if guests:
-            filtered = [
-                listing for listing in filtered
-                if int(listing.get("accommodates", "0") or "0") >= guests
-            ]
-
-        # Filter by budget
-        if budget:
-            filtered = [
-                listing for listing in filtered
-                if self._parse_price(listing.get("price", "$0")) <= budget
-            ]
-
-        return filtered
+        """
+        Apply basic filtering before sending to Claude (vectorized over the store's columns)
 
-    def _parse_price(self, price_str: str) -> float:
-        """Parse price string like '$150.00' to float"""
-        try:
-            # Remove $ and commas, convert to float
-            return float(price_str.replace("$", "").replace(",", ""))
-        except:
-            return 0.0
+        When more than top_k listings pass, keeps the top_k by BM25 score for
+        query_terms (ties by number of reviews), or by number of reviews alone
+        """
+        return self.store.filter_listings(
+            csv_files, guests, budget, bedrooms, bounds, top_k,
+            query_terms=query_terms, ranker=self.ranker
+        )
 
     def _format_listing(self, listing: Dict[str, Any]) -> Dict[str, Any]:
         """Format listing for API response"""
 
-        # Parse price
-        price = self._parse_price(listing.get("price", "$0"))
-
-        # Parse amenities from string like '["WiFi", "Kitchen"]' to list
-        amenities = []
-        try:
-            amenities_str = listing.get("amenities", "")
-            if amenities_str:
-                amenities = json.loads(amenities_str.replace("'", '"'))
-        except:
-            pass
-
         return {
             "id": listing["id"],
             "name": listing["name"],
@@ -269,33 +273,28 @@ Return ONLY a JSON array of indices (numbers), nothing else. Example: [5, 12, 3,
             "host_name": listing["host_name"],
             "host_location": listing["host_location"],
             "host_picture_url": listing["host_picture_url"],
-            "amenities": amenities,
-            "price": price,
+            "amenities": listing["amenities"],
+            "price": listing["price"],
             "property_type": listing["property_type"],
             "room_type": listing["room_type"],
-            "accommodates": int(listing.get("accommodates", "0") or "0"),
-            "bedrooms": int(float(listing.get("bedrooms", "0") or "0")),
-            "beds": int(float(listing.get("beds", "0") or "0")),
+            "accommodates": listing["accommodates"],
+            "bedrooms": listing["bedrooms"],
+            "beds": listing["beds"],
             "bathrooms_text": listing["bathrooms_text"],
             "neighbourhood": listing["neighbourhood_cleansed"],
             "latitude": listing["latitude"],
             "longitude": listing["longitude"],
-            "rating": float(listing.get("review_scores_rating", "0") or "0"),
-            "number_of_reviews": int(listing.get("number_of_reviews", "0") or "0"),
+            "rating": listing["review_scores_rating"],
+            "number_of_reviews": listing["number_of_reviews"],
         }
 
     async def get_listing_by_id(self, listing_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific listing by ID from CSV files"""
-
-        # Load all listings from all CSV files
-        all_listings = self._load_csv_data(location=None)
+        """Get a specific listing by ID via the listing store's id index"""
 
-        # Find the listing with matching ID
-        for listing in all_listings:
-            if listing["id"] == listing_id:
-                return self._format_listing(listing)
+        csv_files = list(set(self.location_csv_map.values()))
+        listing = self.store.get_listing(listing_id, csv_files)
 
-        return None
+        return self._format_listing(listing) if listing else None
 
     def _get_mock_listings(self) -> List[Dict[str, Any]]:
         """Return mock listings when API is not available"""
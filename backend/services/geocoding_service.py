@@ -9,9 +9,15 @@ import aiohttp
 from typing import Optional, Dict, Any
 import logging
 
+from utils.geocode_cache import GeocodeCache, normalize_location
+
 logger = logging.getLogger(__name__)
 
 
+class GeocodingError(Exception):
+    """Transient geocoding failure (network/API error) - not negatively cached"""
+
+
 class GeocodingService:
     """
     Geocoding service using Google Maps Geocoding API
@@ -20,7 +26,7 @@ class GeocodingService:
     - Convert location strings to coordinates
     - Determine location type (city, neighborhood, country, etc.)
     - Calculate dynamic search radius based on location type
-    - Cache results to minimize API calls
+    - Cache results to minimize API calls (memory + SQLite, negative caching)
     """
 
     def __init__(self):
@@ -35,6 +41,8 @@ class GeocodingService:
         else:
             logger.info("Google Maps Geocoding API initialized")
 
+        self.cache = GeocodeCache()
+
     async def geocode(self, location: str) -> Optional[Dict[str, Any]]:
         """
         Convert location string to coordinates
@@ -53,14 +61,35 @@ class GeocodingService:
             }
 
             Returns None if geocoding fails
+
+        Results (including "not found") are cached per provider and normalized
+        location; API/network errors are not cached.
         """
         if not location or not location.strip():
             return None
 
-        if self.use_nominatim:
-            return await self._geocode_nominatim(location)
-        else:
-            return await self._geocode_google(location)
+        provider = "nominatim" if self.use_nominatim else "google"
+        cache_key = f"{provider}:{normalize_location(location)}"
+
+        found, cached = await self.cache.get(cache_key)
+        if found:
+            return cached
+
+        try:
+            if self.use_nominatim:
+                geo_data = await self._geocode_nominatim(location)
+            else:
+                geo_data = await self._geocode_google(location)
+        except GeocodingError as e:
+            logger.error(str(e))
+            return None
+
+        await self.cache.set(cache_key, geo_data)
+        return geo_data
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Geocoding cache hit/miss counters"""
+        return self.cache.stats()
 
     async def _geocode_google(self, location: str) -> Optional[Dict[str, Any]]:
         """
@@ -77,8 +106,7 @@ class GeocodingService:
             async with aiohttp.ClientSession() as session:
                 async with session.get(self.base_url, params=params, timeout=5) as resp:
                     if resp.status != 200:
-                        logger.error(f"Google Maps API error: {resp.status}")
-                        return None
+                        raise GeocodingError(f"Google Maps API error: {resp.status}")
 
                     data = await resp.json()
 
@@ -106,15 +134,14 @@ class GeocodingService:
                         logger.warning(f"No results found for location: {location}")
                         return None
                     else:
-                        logger.error(f"Google Maps API error: {data['status']}")
-                        return None
+                        raise GeocodingError(f"Google Maps API error: {data['status']}")
 
+        except GeocodingError:
+            raise
         except aiohttp.ClientError as e:
-            logger.error(f"Network error during geocoding: {e}")
-            return None
+            raise GeocodingError(f"Network error during geocoding: {e}")
         except Exception as e:
-            logger.error(f"Unexpected error during geocoding: {e}")
-            return None
+            raise GeocodingError(f"Unexpected error during geocoding: {e}")
 
     async def _geocode_nominatim(self, location: str) -> Optional[Dict[str, Any]]:
         """
@@ -138,8 +165,7 @@ class GeocodingService:
             async with aiohttp.ClientSession() as session:
                 async with session.get(url, params=params, headers=headers, timeout=5) as resp:
                     if resp.status != 200:
-                        logger.error(f"Nominatim API error: {resp.status}")
-                        return None
+                        raise GeocodingError(f"Nominatim API error: {resp.status}")
 
                     data = await resp.json()
 
@@ -165,9 +191,10 @@ class GeocodingService:
                         logger.warning(f"No results found for location: {location}")
                         return None
 
+        except GeocodingError:
+            raise
         except Exception as e:
-            logger.error(f"Nominatim geocoding error: {e}")
-            return None
+            raise GeocodingError(f"Nominatim geocoding error: {e}")
 
     def calculate_dynamic_radius(
         self,
@@ -276,9 +303,9 @@ class GeocodingService:
         if self.use_nominatim:
             return True  # Nominatim doesn't need health check
 
-        # Test with a simple geocode request
+        # Test with a simple geocode request (bypasses the cache)
         try:
-            result = await self.geocode("San Francisco")
+            result = await self._geocode_google("San Francisco")
             return result is not None
         except:
             return False
@@ -3,14 +3,13 @@ Groq Service - Ultra-fast LLM inference
 Used for: Real-time search filter extraction, quick content generation
 """
 
-from groq import Groq
-import os
+from utils.llm_client import get_groq_client
 import json
 from typing import Dict, Any, List
 
 class GroqService:
     def __init__(self):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.client = get_groq_client()
         self.model = "llama-3.3-70b-versatile"  # Fast and good
 
     async def extract_search_filters(
@@ -56,7 +55,7 @@ Return a JSON object with these fields (only include if mentioned):
 
 Return ONLY valid JSON, nothing else."""
 
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             messages=[{"role": "user", "content": prompt}],
             model=self.model,
             temperature=0.1,
@@ -102,7 +101,7 @@ Return JSON:
   "description": "..."
 }}"""
 
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             messages=[{"role": "user", "content": prompt}],
             model=self.model,
             temperature=0.7,
@@ -118,7 +117,7 @@ Return JSON:
         messages = context or []
         messages.append({"role": "user", "content": message})
 
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             messages=messages,
             model=self.model,
             temperature=0.7
@@ -139,7 +138,7 @@ Amenities: {', '.join(listing_data.get('amenities', []))}
 
 Make it exciting and highlight the best parts. Be conversational."""
 
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             messages=[{"role": "user", "content": prompt}],
             model=self.model,
             temperature=0.8
@@ -156,7 +155,7 @@ Make it exciting and highlight the best parts. Be conversational."""
         """
         General-purpose completion generation
         """
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             messages=[{"role": "user", "content": prompt}],
             model=self.model,
             temperature=temperature,
@@ -4,12 +4,17 @@ Analyzes and selects the best photos from AR glasses scan
 Uses Claude Vision to assess quality, composition, and relevance
 """
 
-import os
 from typing import List, Dict, Any
-from anthropic import Anthropic
+from utils.llm_client import get_claude_client
+from utils.vision_cache import get_vision_cache
+import asyncio
 import base64
 import httpx
 
+# Bump when a prompt changes so cached analyses from the old prompt are ignored
+BATCH_PROMPT_VERSION = "v1"
+QUICK_CHECK_PROMPT_VERSION = "v1"
+
 
 class ImageFilterService:
     """
@@ -24,8 +29,9 @@ class ImageFilterService:
     """
 
     def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = get_claude_client()
         self.model = "claude-sonnet-4-5-20250929"
+        self.cache = get_vision_cache()
 
     async def analyze_photo_batch(
         self,
@@ -129,27 +135,38 @@ IMPORTANT:
                 }
             })
 
-        try:
-            # Analyze with Claude Vision
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=2048,
-                messages=[{
-                    "role": "user",
-                    "content": content
-                }]
-            )
-
-            response_text = response.content[0].text
+        # Unchanged photos + prompt reuse the previous analysis
+        photo_keys = list(await asyncio.gather(*[self.cache.photo_key(url) for url in photos_to_analyze]))
+        cache_key = self.cache.make_key(
+            "photo_batch", BATCH_PROMPT_VERSION, photo_keys,
+            max_photos=max_photos, model=self.model
+        )
 
-            # Parse JSON response
-            import json
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-
-            analysis = json.loads(response_text)
+        try:
+            analysis = await self.cache.get(cache_key)
+
+            if analysis is None:
+                # Analyze with Claude Vision
+                response = await self.client.messages.create(
+                    model=self.model,
+                    max_tokens=2048,
+                    messages=[{
+                        "role": "user",
+                        "content": content
+                    }]
+                )
+
+                response_text = response.content[0].text
+
+                # Parse JSON response
+                import json
+                if "```json" in response_text:
+                    response_text = response_text.split("```json")[1].split("```")[0].strip()
+                elif "```" in response_text:
+                    response_text = response_text.split("```")[1].split("```")[0].strip()
+
+                analysis = json.loads(response_text)
+                await self.cache.set(cache_key, analysis, ttl_seconds=self.cache.ttl_for(photo_keys))
 
             # Format results
             selected_photos = []
@@ -264,8 +281,17 @@ Return JSON:
 }
 """
 
+        # Real-time path: no HEAD request, so the cached result is time-limited
+        photo_keys = [await self.cache.photo_key(photo_url, validate=False)]
+        cache_key = self.cache.make_key(
+            "quick_quality_check", QUICK_CHECK_PROMPT_VERSION, photo_keys, model=self.model
+        )
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=256,
                 messages=[{
@@ -291,7 +317,9 @@ Return JSON:
             elif "```" in response_text:
                 response_text = response_text.split("```")[1].split("```")[0].strip()
 
-            return json.loads(response_text)
+            result = json.loads(response_text)
+            await self.cache.set(cache_key, result, ttl_seconds=self.cache.ttl_for(photo_keys))
+            return result
 
         except Exception as e:
             print(f"Quick check error: {e}")
@@ -0,0 +1,392 @@
+"""
+Listing Store - Resident, pre-parsed listing data for CSV search
+
+Parses each dataset CSV once, keeps typed rows in memory for the life of the
+process, and only re-parses a file when its mtime changes. Numeric fields are
+also kept as NumPy columns so basic filters run as vectorized masks.
+"""
+
+import os
+import csv
+import json
+import threading
+import numpy as np
+from collections import Counter
+from typing import List, Dict, Any, Optional
+from services.bm25_ranker import BM25Ranker, build_postings
+
+
+def parse_price(price_str: str) -> float:
+    """Parse price string like '$150.00' to float"""
+    try:
+        # Remove $ and commas, convert to float
+        return float(price_str.replace("$", "").replace(",", ""))
+    except:
+        return 0.0
+
+
+def _parse_int(value: str) -> int:
+    """Parse integer-ish CSV cell ('2', '2.0', '') to int"""
+    try:
+        return int(float(value or "0"))
+    except:
+        return 0
+
+
+def _parse_float(value: str) -> float:
+    """Parse float CSV cell, empty/invalid becomes 0.0"""
+    try:
+        return float(value or "0")
+    except:
+        return 0.0
+
+
+def _parse_coord(value: str) -> float:
+    """Parse latitude/longitude cell, missing values become NaN (never inside a bbox)"""
+    try:
+        return float(value)
+    except:
+        return float("nan")
+
+
+def _parse_amenities(amenities_str: str) -> List[str]:
+    """Decode amenities from string like '["WiFi", "Kitchen"]' to a list of strings"""
+    if not amenities_str:
+        return []
+    try:
+        amenities = json.loads(amenities_str)
+    except:
+        try:
+            amenities = json.loads(amenities_str.replace("'", '"'))
+        except:
+            return []
+
+    if not isinstance(amenities, list):
+        return []
+    return [amenity for amenity in amenities if isinstance(amenity, str)]
+
+
+def parse_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """Convert a raw CSV row into a typed listing record"""
+    # csv.DictReader fills cells missing from short rows with None
+    row = {key: value if value is not None else "" for key, value in row.items()}
+
+    listing = {
+        "id": row.get("id", ""),
+        "name": row.get("name", ""),
+        "description": row.get("description", ""),
+        "picture_url": row.get("picture_url", ""),
+        "host_name": row.get("host_name", ""),
+        "host_location": row.get("host_location", ""),
+        "host_picture_url": row.get("host_picture_url", ""),
+        "amenities": _parse_amenities(row.get("amenities", "")),
+        "price": parse_price(row.get("price", "$0") or "$0"),
+        "property_type": row.get("property_type", ""),
+        "room_type": row.get("room_type", ""),
+        "accommodates": _parse_int(row.get("accommodates", "0")),
+        "bedrooms": _parse_int(row.get("bedrooms", "0")),
+        "beds": _parse_int(row.get("beds", "0")),
+        "bathrooms_text": row.get("bathrooms_text", ""),
+        "neighbourhood_cleansed": row.get("neighbourhood_cleansed", ""),
+        "latitude": row.get("latitude", ""),
+        "longitude": row.get("longitude", ""),
+        "review_scores_rating": _parse_float(row.get("review_scores_rating", "0")),
+        "number_of_reviews": _parse_int(row.get("number_of_reviews", "0")),
+    }
+
+    return listing
+
+
+def build_columns(listings: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Build NumPy columns for the numeric fields used by basic filters"""
+    count = len(listings)
+
+    def column(values, dtype):
+        return np.fromiter(values, dtype=dtype, count=count)
+
+    return {
+        "price": column((l["price"] for l in listings), np.float64),
+        "accommodates": column((l["accommodates"] for l in listings), np.int32),
+        "bedrooms": column((l["bedrooms"] for l in listings), np.int32),
+        "latitude": column((_parse_coord(l["latitude"]) for l in listings), np.float64),
+        "longitude": column((_parse_coord(l["longitude"]) for l in listings), np.float64),
+        "rating": column((l["review_scores_rating"] for l in listings), np.float64),
+        "number_of_reviews": column((l["number_of_reviews"] for l in listings), np.int64),
+    }
+
+
+def filter_mask(
+    columns: Dict[str, np.ndarray],
+    guests: Optional[int] = None,
+    budget: Optional[float] = None,
+    bedrooms: Optional[int] = None,
+    bounds: Optional[Dict[str, Dict[str, float]]] = None
+) -> np.ndarray:
+    """
+    Evaluate basic constraints as one boolean mask over the columns
+
+    Args:
+        columns: Columns from build_columns()
+        guests: Minimum guest capacity
+        budget: Maximum price per night
+        bedrooms: Minimum number of bedrooms
+        bounds: Google-style bounding box
+            {"northeast": {"lat": ..., "lng": ...}, "southwest": {"lat": ..., "lng": ...}}
+    """
+    mask = np.ones(len(columns["price"]), dtype=bool)
+
+    if guests:
+        mask &= columns["accommodates"] >= guests
+
+    if budget:
+        mask &= columns["price"] <= budget
+
+    if bedrooms:
+        mask &= columns["bedrooms"] >= bedrooms
+
+    if bounds:
+        northeast = bounds["northeast"]
+        southwest = bounds["southwest"]
+        lat = columns["latitude"]
+        lon = columns["longitude"]
+        mask &= (lat >= southwest["lat"]) & (lat <= northeast["lat"])
+        mask &= (lon >= southwest["lng"]) & (lon <= northeast["lng"])
+
+    return mask
+
+
+def _top_k_by_score(scores: np.ndarray, reviews: np.ndarray, top_k: int) -> np.ndarray:
+    """Positions of the top_k scores (ties broken by most reviews), best first"""
+    threshold = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)
+    needed = top_k - len(above)
+    if len(tied) > needed:
+        tied = tied[np.argpartition(-reviews[tied], needed - 1)[:needed]]
+
+    top = np.concatenate([above, tied])
+    return top[np.lexsort((-reviews[top], -scores[top]))]
+
+
+class ListingStore:
+    """In-memory store of parsed CSV listings, reloaded per file on mtime change"""
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+
+        # csv_file -> {"mtime": float, "listings": [...], "by_id": {id: listing},
+        #              "columns": {name: np.ndarray}, "postings": BM25 inverted index}
+        self._files: Dict[str, Dict[str, Any]] = {}
+
+        # listing id -> csv_file, updated per file as datasets reload
+        self._id_index: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        # Bumped whenever any dataset is (re)loaded or disappears
+        self.version = 0
+
+    def get_listings(self, csv_files: List[str]) -> List[Dict[str, Any]]:
+        """Return parsed listings for the given CSV files, loading any that are stale"""
+        all_listings = []
+
+        for csv_file in csv_files:
+            entry = self._get_file(csv_file)
+            if entry:
+                all_listings.extend(entry["listings"])
+
+        return all_listings
+
+    def filter_listings(
+        self,
+        csv_files: List[str],
+        guests: Optional[int] = None,
+        budget: Optional[float] = None,
+        bedrooms: Optional[int] = None,
+        bounds: Optional[Dict[str, Dict[str, float]]] = None,
+        top_k: Optional[int] = None,
+        query_terms: Optional[List[str]] = None,
+        ranker: Optional[BM25Ranker] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return listings from the given CSV files that pass the basic constraints
+
+        If top_k is set and more listings match, only the top_k are returned,
+        selected with a partial partition instead of a full sort. With a
+        ranker and query_terms they are the top_k by BM25 score over the whole
+        matching set, number of reviews breaking ties (so a query matching
+        nothing falls back to the most reviewed); otherwise the top_k by
+        number of reviews.
+        """
+        matches = []  # (listings, matching row indices) per file
+
+        for csv_file in csv_files:
+            entry = self._get_file(csv_file)
+            if not entry:
+                continue
+
+            mask = filter_mask(entry["columns"], guests, budget, bedrooms, bounds)
+            matches.append((entry, np.flatnonzero(mask)))
+
+        total = sum(len(indices) for _, indices in matches)
+
+        if not top_k or total <= top_k:
+            filtered = []
+            for entry, indices in matches:
+                listings = entry["listings"]
+                filtered.extend(listings[i] for i in indices)
+            return filtered
+
+        reviews = np.concatenate([
+            entry["columns"]["number_of_reviews"][indices] for entry, indices in matches
+        ])
+
+        if ranker and query_terms:
+            term_statistics = self.term_statistics(csv_files, query_terms)
+            scores = np.concatenate([
+                ranker.score(query_terms, entry["postings"], term_statistics)[indices]
+                for entry, indices in matches
+            ])
+            top = _top_k_by_score(scores, reviews, top_k)
+        else:
+            top = np.argpartition(-reviews, top_k - 1)[:top_k]
+            top = top[np.argsort(-reviews[top], kind="stable")]
+
+        # Map positions in the concatenated array back to (file, row)
+        ends = np.cumsum([len(indices) for _, indices in matches])
+        file_numbers = np.searchsorted(ends, top, side="right")
+
+        filtered = []
+        for position, file_number in zip(top, file_numbers):
+            entry, indices = matches[file_number]
+            start = ends[file_number] - len(indices)
+            filtered.append(entry["listings"][indices[position - start]])
+
+        return filtered
+
+    def term_statistics(self, csv_files: List[str], terms: List[str]) -> Dict[str, Any]:
+        """Corpus statistics for BM25 over the given CSV files, limited to the query terms"""
+        doc_count = 0
+        total_terms = 0
+        df = Counter()
+
+        for csv_file in csv_files:
+            entry = self._get_file(csv_file)
+            if not entry:
+                continue
+
+            postings = entry["postings"]
+            doc_count += len(entry["listings"])
+            total_terms += int(postings["lengths"].sum())
+            for term in set(terms):
+                term_id = postings["term_ids"].get(term)
+                if term_id is not None:
+                    df[term] += int(postings["offsets"][term_id + 1] - postings["offsets"][term_id])
+
+        return {
+            "doc_count": doc_count,
+            "avg_length": total_terms / doc_count if doc_count else 0.0,
+            "df": df,
+        }
+
+    def dataset_version(self, csv_files: List[str]) -> int:
+        """Refresh the given CSV files and return the current dataset version"""
+        for csv_file in csv_files:
+            self._get_file(csv_file)
+        return self.version
+
+    def lookup_ids(self, listing_ids: List[str]) -> List[Dict[str, Any]]:
+        """Resolve ids through the index as currently loaded (no freshness check)"""
+        listings = []
+
+        for listing_id in listing_ids:
+            entry = self._files.get(self._id_index.get(listing_id))
+            if entry and listing_id in entry["by_id"]:
+                listings.append(entry["by_id"][listing_id])
+
+        return listings
+
+    def get_listing(self, listing_id: str, csv_files: List[str]) -> Optional[Dict[str, Any]]:
+        """Look up a single listing by id via the hash index (no scan of the rows)"""
+        # Make sure every dataset is loaded and current so the index is complete
+        for csv_file in csv_files:
+            self._get_file(csv_file)
+
+        csv_file = self._id_index.get(listing_id)
+        if not csv_file:
+            return None
+
+        entry = self._files.get(csv_file)
+        return entry["by_id"].get(listing_id) if entry else None
+
+    def _get_file(self, csv_file: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a CSV file, re-parsing it if its mtime changed"""
+        csv_path = os.path.join(self.base_path, csv_file)
+
+        try:
+            mtime = os.path.getmtime(csv_path)
+        except OSError:
+            print(f"Warning: CSV file not found: {csv_path}")
+            if csv_file in self._files:
+                with self._lock:
+                    self._drop_from_index(csv_file)
+                    self._files.pop(csv_file, None)
+                    self.version += 1
+            return None
+
+        entry = self._files.get(csv_file)
+        if entry and entry["mtime"] == mtime:
+            return entry
+
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            entry = self._files.get(csv_file)
+            if entry and entry["mtime"] == mtime:
+                return entry
+
+            try:
+                with open(csv_path, 'r', encoding='utf-8') as f:
+                    listings = [parse_row(row) for row in csv.DictReader(f)]
+
+                by_id = {listing["id"]: listing for listing in listings}
+                new_entry = {
+                    "mtime": mtime,
+                    "listings": listings,
+                    "by_id": by_id,
+                    "columns": build_columns(listings),
+                    "postings": build_postings(listings),
+                }
+            except Exception as e:
+                print(f"Error reading CSV {csv_file}: {e}")
+                return entry
+
+            # Rebuild only this file's slice of the id index
+            self._drop_from_index(csv_file)
+            for listing_id in by_id:
+                self._id_index[listing_id] = csv_file
+            self._files[csv_file] = new_entry
+            self.version += 1
+            print(f"📂 Loaded {len(listings)} listings from {csv_file}")
+
+            return new_entry
+
+    def _drop_from_index(self, csv_file: str):
+        """Remove a file's ids from the id index (caller holds the lock)"""
+        old_entry = self._files.get(csv_file)
+        if not old_entry:
+            return
+
+        for listing_id in old_entry["by_id"]:
+            if self._id_index.get(listing_id) == csv_file:
+                del self._id_index[listing_id]
+
+
+# Singleton instance, shared by every CSVSearchService in the process
+_listing_store = None
+
+def get_listing_store(base_path: str) -> ListingStore:
+    """Get or create ListingStore singleton"""
+    global _listing_store
+    if _listing_store is None:
+        _listing_store = ListingStore(base_path)
+    return _listing_store
@@ -4,9 +4,8 @@ Analyzes images of places users like to extract search preferences
 Uses Claude Vision to understand style, amenities, and vibes
 """
 
-import os
 from typing import List, Dict, Any
-from anthropic import Anthropic
+from utils.llm_client import get_claude_client
 import base64
 import httpx
 
@@ -24,7 +23,7 @@ class PreferenceAnalysisService:
     """
 
     def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = get_claude_client()
         self.model = "claude-sonnet-4-5-20250929"
 
     async def analyze_preference_images(
@@ -134,7 +133,7 @@ IMPORTANT:
 
         try:
             # Analyze with Claude Vision
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=2048,
                 messages=[{
@@ -6,7 +6,7 @@ Uses Groq + Claude for market analysis with day-of-week, seasonality, and compet
 import os
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
-from groq import Groq
+from utils.llm_client import get_groq_client
 
 
 class PricingService:
@@ -21,7 +21,7 @@ class PricingService:
     """
 
     def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.groq_client = get_groq_client()
         self.model = "llama-3.3-70b-versatile"
 
     async def analyze_pricing(
@@ -87,7 +87,7 @@ Format your response as JSON:
 Only respond with the JSON, no other text."""
 
         # Call Groq for fast pricing analysis
-        response = self.groq_client.chat.completions.create(
+        response = await self.groq_client.chat.completions.create(
             model=self.model,
             messages=[{
                 "role": "user",
@@ -5,7 +5,7 @@ Uses Claude for context-aware responses
 
 import os
 from typing import Dict, Any, List
-from anthropic import Anthropic
+from utils.llm_client import get_claude_client
 
 
 class QAService:
@@ -20,7 +20,7 @@ class QAService:
     """
 
     def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = get_claude_client()
         self.model = "claude-sonnet-4-5-20250929"
 
     async def answer_question(
@@ -65,7 +65,7 @@ Instructions:
 Your answer:"""
 
         # Call Claude
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model,
             max_tokens=500,
             messages=[{
@@ -131,7 +131,7 @@ Format your response as a JSON array:
 Only include questions that can be answered from the listing information. Be specific and helpful.
 """
 
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model,
             max_tokens=2000,
             messages=[{
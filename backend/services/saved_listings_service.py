@@ -3,10 +3,9 @@ Saved Listings Service
 Auto-organizes saved listings by relevance and learned preferences
 """
 
-import os
 from typing import Dict, Any, List
 import json
-from anthropic import Anthropic
+from utils.llm_client import get_claude_client
 
 class SavedListingsService:
     """
@@ -23,7 +22,7 @@ class SavedListingsService:
     """
 
     def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = get_claude_client()
         self.model = "claude-sonnet-4-5-20250929"
 
     async def get_and_rank_saved_listings(
@@ -108,7 +107,7 @@ IMPORTANT:
 
         try:
             # Get ranking from Claude
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=4096,
                 messages=[{
@@ -3,11 +3,10 @@ Seller Chatbot Service
 Conversational interface for sellers to review and edit their listings
 """
 
-import os
 from typing import Dict, Any, List
 import json
 from datetime import date
-from anthropic import Anthropic
+from utils.llm_client import get_claude_client
 
 class SellerChatbotService:
     """
@@ -23,7 +22,7 @@ class SellerChatbotService:
     """
 
     def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = get_claude_client()
         self.model = "claude-sonnet-4-5-20250929"
 
     async def start_listing_review(
@@ -192,7 +191,7 @@ Be conversational and helpful!
 """
 
         # Get Claude's response
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model,
             max_tokens=1024,
             messages=[{
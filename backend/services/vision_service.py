@@ -3,52 +3,104 @@ Anthropic Claude Vision Service
 Used for: Photo analysis, amenity detection, image understanding
 """
 
-from anthropic import Anthropic
+from utils.llm_client import get_claude_client
+from utils.vision_cache import get_vision_cache
 import os
+import asyncio
 import base64
 from typing import List, Dict
 import json
 
+# Bump when the amenity prompt changes so cached analyses from the old prompt are ignored
+AMENITY_PROMPT_VERSION = "v1"
+
 class VisionService:
     def __init__(self):
-        self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.client = get_claude_client()
         self.vision_model = "claude-sonnet-4-5-20250929"  # Claude Sonnet 4.5
 
+        # Per-photo analyses run concurrently, bounded and individually timed out
+        self.photo_concurrency = int(os.getenv("VISION_PHOTO_CONCURRENCY", "5"))
+        self.photo_timeout = float(os.getenv("VISION_PHOTO_TIMEOUT", "45"))
+
+        # Content-addressed results, so unchanged photos are never re-analyzed
+        self.cache = get_vision_cache()
+
     async def detect_amenities(self, photos: List[str]) -> List[str]:
         """
         Analyze listing photos and detect all amenities
+
+        Photos are analyzed concurrently (up to VISION_PHOTO_CONCURRENCY at once);
+        photos that fail or exceed VISION_PHOTO_TIMEOUT are skipped so the rest
+        still come back.
+
         Returns: List of detected amenities
         """
+        semaphore = asyncio.Semaphore(self.photo_concurrency)
+
+        async def analyze(photo: str) -> Dict:
+            async with semaphore:
+                return await asyncio.wait_for(self._analyze_photo(photo), self.photo_timeout)
+
+        photos = photos[:10]  # Analyze first 10 photos
+        results = await asyncio.gather(*[analyze(photo) for photo in photos], return_exceptions=True)
+
         all_amenities = []
         all_features = []
 
-        for photo in photos[:10]:  # Analyze first 10 photos
-            # Handle base64 or URL
-            if photo.startswith('http'):
-                image_source = {
-                    "type": "url",
-                    "url": photo
-                }
-            else:
-                image_source = {
-                    "type": "base64",
-                    "media_type": "image/jpeg",
-                    "data": photo
-                }
-
-            message = self.client.messages.create(
-                model=self.vision_model,
-                max_tokens=1024,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": image_source,
-                        },
-                        {
-                            "type": "text",
-                            "text": """Analyze this property photo in detail.
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException):
+                print(f"⚠️ Vision analysis failed for photo {i + 1}/{len(photos)}: {result!r}")
+                continue
+            all_amenities.extend(result.get("amenities", []))
+            all_features.extend(result.get("special_features", []))
+
+        # Combine and deduplicate (case-insensitive, first spelling wins)
+        combined = {}
+        for item in all_amenities + all_features:
+            if isinstance(item, str) and item.strip():
+                combined.setdefault(item.strip().lower(), item.strip())
+        return list(combined.values())
+
+    async def _analyze_photo(self, photo: str) -> Dict:
+        """
+        Run one Claude Vision amenity analysis on a photo (URL or base64)
+        Returns: {"room_type", "amenities", "style", "special_features", "quality_score"}
+        """
+        photo_keys = [await self.cache.photo_key(photo)]
+        cache_key = self.cache.make_key(
+            "detect_amenities", AMENITY_PROMPT_VERSION, photo_keys, model=self.vision_model
+        )
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Handle base64 or URL
+        if photo.startswith('http'):
+            image_source = {
+                "type": "url",
+                "url": photo
+            }
+        else:
+            image_source = {
+                "type": "base64",
+                "media_type": "image/jpeg",
+                "data": photo
+            }
+
+        message = await self.client.messages.create(
+            model=self.vision_model,
+            max_tokens=1024,
+            messages=[{
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": image_source,
+                    },
+                    {
+                        "type": "text",
+                        "text": """Analyze this property photo in detail.
 
 Detect and list ALL amenities, features, and characteristics visible:
 
@@ -72,30 +124,26 @@ Return ONLY a JSON object (no markdown):
   "special_features": ["...", "..."],
   "quality_score": 1-10
 }"""
-                        }
-                    ],
-                }]
-            )
-
-            try:
-                # Extract JSON from response
-                content = message.content[0].text
-                # Remove markdown code blocks if present
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-
-                result = json.loads(content)
-                all_amenities.extend(result.get("amenities", []))
-                all_features.extend(result.get("special_features", []))
-            except:
-                # If JSON parsing fails, extract text
-                all_amenities.append(message.content[0].text)
-
-        # Combine and deduplicate
-        combined = list(set(all_amenities + all_features))
-        return combined
+                    }
+                ],
+            }]
+        )
+
+        try:
+            # Extract JSON from response
+            content = message.content[0].text
+            # Remove markdown code blocks if present
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0].strip()
+            elif "```" in content:
+                content = content.split("```")[1].split("```")[0].strip()
+
+            result = json.loads(content)
+            await self.cache.set(cache_key, result, ttl_seconds=self.cache.ttl_for(photo_keys))
+            return result
+        except:
+            # If JSON parsing fails, extract text
+            return {"amenities": [message.content[0].text]}
 
     async def rank_by_relevance(
         self,
@@ -139,7 +187,7 @@ Return ONLY a JSON array (no markdown) of listing IDs in ranked order with brief
   {{"id": "...", "rank": 2, "reason": "..."}}
 ]"""
 
-        message = self.client.messages.create(
+        message = await self.client.messages.create(
             model=self.vision_model,
             max_tokens=2048,
             messages=[{"role": "user", "content": prompt}]
@@ -7,7 +7,7 @@ Voice Service - Vapi + Groq integration
 import os
 from typing import Dict, Any
 import httpx
-from groq import Groq
+from utils.llm_client import get_groq_client
 
 
 class VoiceService:
@@ -20,7 +20,7 @@ class VoiceService:
     def __init__(self):
         self.vapi_api_key = os.getenv("VAPI_API_KEY", "")
         self.vapi_base_url = "https://api.vapi.ai"
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        self.groq_client = get_groq_client()
 
     async def transcribe(self, audio_file: Any) -> str:
         """
@@ -36,32 +36,16 @@ class VoiceService:
         # Read audio data
         audio_data = await audio_file.read()
 
-        # Save to temporary file (Groq SDK requires file path)
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{audio_file.filename.split('.')[-1]}") as temp_file:
-            temp_file.write(audio_data)
-            temp_path = temp_file.name
-
-        try:
-            # Use Groq Whisper for transcription
-            with open(temp_path, "rb") as audio:
-                transcription = self.groq_client.audio.transcriptions.create(
-                    file=audio,
-                    model="whisper-large-v3",
-                    response_format="json",
-                    language="en",
-                    temperature=0.0
-                )
-
-            return transcription.text
-
-        finally:
-            # Clean up temp file
-            import os as os_module
-            try:
-                os_module.unlink(temp_path)
-            except:
-                pass
+        # Use Groq Whisper for transcription (SDK accepts an in-memory (filename, bytes) upload)
+        transcription = await self.groq_client.audio.transcriptions.create(
+            file=(audio_file.filename, audio_data),
+            model="whisper-large-v3",
+            response_format="json",
+            language="en",
+            temperature=0.0
+        )
+
+        return transcription.text
 
     async def create_assistant(self, listing_data: Dict[str, Any]) -> Dict[str, str]:
         """
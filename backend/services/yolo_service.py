@@ -6,11 +6,254 @@ Optimized for phone camera streaming and pricing amenity extraction
 from ultralytics import YOLO
 import cv2
 import numpy as np
-from typing import Dict, Any, List, Set
+from typing import Dict, Any, List
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+import asyncio
+import base64
 import os
+import shutil
+import tempfile
+import threading
+import time
 import uuid
 from datetime import datetime
+from utils.session_store import get_session_store
+
+
+def _set_torch_threads(num_threads: int):
+    """Pin torch intra-op threads so concurrent inference workers don't oversubscribe the CPU"""
+    if num_threads and num_threads > 0:
+        import torch
+        torch.set_num_threads(num_threads)
+
+
+def _frame_thumbnail(image_bytes, size: int = 32) -> np.ndarray:
+    """
+    Tiny grayscale thumbnail for cheap change detection (None if invalid)
+
+    IMREAD_REDUCED_GRAYSCALE_8 lets libjpeg decode at 1/8 scale, so this costs a
+    fraction of a full decode.
+    """
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    gray = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+# JPEG start-of-frame markers (carry the image dimensions)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# libjpeg can decode directly at 1/2, 1/4 or 1/8 scale (largest factor first)
+_REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+]
+
+# Letterbox canvases reused across frames, one set per inference thread
+_canvas_pool = threading.local()
+
+
+def _jpeg_size(image_bytes) -> tuple:
+    """(width, height) read from the JPEG header without decoding (None if not a JPEG)"""
+    data = memoryview(image_bytes)
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # standalone markers
+            i += 2
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + ((data[i + 2] << 8) | data[i + 3])
+
+    return None
+
+
+def _decode_for_model(image_bytes, imgsz: int) -> tuple:
+    """
+    Decode a frame at the smallest JPEG scale that still covers the model input
+
+    Returns (image, original (width, height)); image is None if invalid.
+    A 1920px frame for a 640px model decodes at 1/2 scale instead of full size.
+
+    imdecode applies EXIF orientation, so the original size is reported in the
+    decoded (upright) orientation - the header's width/height are swapped for
+    phone frames rotated by 90 or 270 degrees.
+    """
+    size = _jpeg_size(image_bytes)
+    flag = cv2.IMREAD_COLOR
+    factor = 1
+
+    if size:
+        for reduced_factor, reduced_flag in _REDUCED_DECODE_FLAGS:
+            if max(size) // reduced_factor >= imgsz:
+                flag, factor = reduced_flag, reduced_factor
+                break
+
+    image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flag)
+    if image is None:
+        return None, None
+
+    decoded = (image.shape[1], image.shape[0])
+    if factor == 1:
+        return image, decoded
+
+    # libjpeg rounds reduced dimensions up
+    width, height = size
+    if decoded == (-(-width // factor), -(-height // factor)):
+        return image, (width, height)
+    if decoded == (-(-height // factor), -(-width // factor)):
+        return image, (height, width)
+    return image, (decoded[0] * factor, decoded[1] * factor)
+
+
+def _letterbox(image: np.ndarray, imgsz: int, slot: int, stride: int = 32) -> tuple:
+    """
+    Resize once into a reused, stride-aligned canvas (long side = imgsz, grey padding)
+
+    This is the shape ultralytics would letterbox to itself, so it skips its own
+    resize. Returns (canvas, ratio, (pad_x, pad_y)) for mapping boxes back.
+    """
+    h, w = image.shape[:2]
+    ratio = min(imgsz / h, imgsz / w)
+    new_w, new_h = max(1, round(w * ratio)), max(1, round(h * ratio))
+    canvas_w = -(-new_w // stride) * stride
+    canvas_h = -(-new_h // stride) * stride
+    pad_x, pad_y = (canvas_w - new_w) // 2, (canvas_h - new_h) // 2
+
+    canvases = getattr(_canvas_pool, "canvases", None)
+    if canvases is None:
+        canvases = _canvas_pool.canvases = {}
+    key = (slot, canvas_h, canvas_w)
+    canvas = canvases.get(key)
+    if canvas is None:
+        canvas = canvases[key] = np.empty((canvas_h, canvas_w, 3), np.uint8)
+
+    # Grey padding strips, then the resized frame straight into the canvas. The
+    # reduced decode keeps ratio within 2x, so bilinear doesn't alias.
+    canvas[:pad_y] = 114
+    canvas[pad_y + new_h:] = 114
+    canvas[:, :pad_x] = 114
+    canvas[:, pad_x + new_w:] = 114
+    cv2.resize(
+        image, (new_w, new_h),
+        dst=canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w],
+        interpolation=cv2.INTER_LINEAR
+    )
+
+    return canvas, ratio, (pad_x, pad_y)
+
+
+def _predict_frames(model, frames: List[Any], confidence: float, imgsz: int = 640) -> List[Dict[str, np.ndarray]]:
+    """
+    Decode, letterbox and run one batched forward pass over encoded frames
+
+    Returns one entry per frame: None if the frame couldn't be decoded, else
+    {"cls": int array, "conf": float array, "xyxy": (n, 4) array} - plain
+    NumPy so results can cross a process boundary. Boxes are in the original
+    frame's pixel coordinates.
+    """
+    inputs = []
+    for slot, frame in enumerate(frames):
+        image, original_size = _decode_for_model(frame, imgsz)
+        if image is None:
+            inputs.append(None)
+            continue
+        canvas, ratio, pad = _letterbox(image, imgsz, slot)
+        inputs.append((canvas, ratio, pad, original_size, image.shape))
+
+    valid = [i for i, entry in enumerate(inputs) if entry is not None]
+
+    detections = [None] * len(frames)
+    if valid:
+        results = model([inputs[i][0] for i in valid], conf=confidence, imgsz=imgsz, verbose=False)
+        for i, result in zip(valid, results):
+            _, ratio, (pad_x, pad_y), (width, height), decoded_shape = inputs[i]
+            boxes = result.boxes
+
+            # Canvas -> decoded image -> original frame coordinates
+            xyxy = boxes.xyxy.cpu().numpy().astype(np.float32)
+            xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad_x) / ratio * (width / decoded_shape[1])
+            xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad_y) / ratio * (height / decoded_shape[0])
+            np.clip(xyxy[:, [0, 2]], 0, width, out=xyxy[:, [0, 2]])
+            np.clip(xyxy[:, [1, 3]], 0, height, out=xyxy[:, [1, 3]])
+
+            detections[i] = {
+                "cls": boxes.cls.cpu().numpy().astype(np.int32),
+                "conf": boxes.conf.cpu().numpy(),
+                "xyxy": xyxy,
+            }
+
+    return detections
+
+
+# Exported model locations, relative to the .pt weights they were exported from
+_EXPORT_SUFFIXES = {"onnx": ".onnx", "openvino": "_openvino_model"}
+
+
+def _resolve_model_path(model_path: str, backend: str, imgsz: int) -> str:
+    """
+    Model file to load for an inference backend, exporting the .pt weights on first use
+
+    "torch" loads model_path as-is. "onnx" / "openvino" load yolov8n.onnx /
+    yolov8n_openvino_model/ next to yolov8n.pt; both run through ultralytics'
+    AutoBackend, so results have the same shape as the PyTorch model's. Exports
+    use dynamic shapes so batched, rectangular letterboxed frames still work.
+    """
+    if backend == "torch" or not model_path.endswith(".pt"):
+        return model_path
+    if backend not in _EXPORT_SUFFIXES:
+        raise ValueError(f"Unknown YOLO_BACKEND '{backend}' (expected torch, onnx or openvino)")
+
+    exported = model_path[:-3] + _EXPORT_SUFFIXES[backend]
+    if not os.path.exists(exported):
+        print(f"📦 Exporting {model_path} for {backend} (one-time)...")
+        exported = YOLO(model_path).export(format=backend, imgsz=imgsz, dynamic=True)
+
+    return exported
+
+
+# Per-process model for the process-pool executor backend
+_worker_model = None
+
+def _init_process_worker(model_path: str, torch_threads: int):
+    """ProcessPoolExecutor initializer: load one model per worker process"""
+    global _worker_model
+    _set_torch_threads(torch_threads)
+    _worker_model = YOLO(model_path, task="detect")
+
+
+def _predict_in_worker(frames: List[bytes], confidence: float, imgsz: int) -> List[Dict[str, np.ndarray]]:
+    """Batch prediction entry point inside a worker process"""
+    return _predict_frames(_worker_model, frames, confidence, imgsz)
+
+
+# Per-thread models for the thread executor backend: ultralytics predictors
+# aren't thread-safe, so with more than one inference thread each thread
+# loads its own copy on first use
+_thread_models = threading.local()
+
+def _predict_in_thread(model_path: str, frames: List[bytes], confidence: float,
+                       imgsz: int) -> List[Dict[str, np.ndarray]]:
+    """Batch prediction entry point on an inference thread with its own model"""
+    model = getattr(_thread_models, "model", None)
+    if model is None:
+        model = _thread_models.model = YOLO(model_path, task="detect")
+    return _predict_frames(model, frames, confidence, imgsz)
 
 
 class YOLOService:
@@ -19,11 +262,19 @@ class YOLOService:
         Initialize YOLO model for fast real-time detection
 
         Args:
-            model_path: "yolov8n.pt" (nano - fastest, recommended)
+            model_path: "yolov8n.pt" (nano - fastest, recommended). With
+                YOLO_BACKEND=onnx or openvino the weights are exported once and
+                the exported model is loaded instead.
         """
         try:
-            self.model = YOLO(model_path)
             self.confidence_threshold = float(os.getenv("YOLO_CONFIDENCE", "0.45"))
+            self.imgsz = int(os.getenv("YOLO_IMGSZ", "640"))  # model input size (long side)
+
+            # Inference backend: "torch" (default), "onnx" (ONNX Runtime) or "openvino"
+            self.backend = os.getenv("YOLO_BACKEND", "torch").lower()
+            model_path = _resolve_model_path(model_path, self.backend, self.imgsz)
+            self.model = YOLO(model_path, task="detect")
+            self.model_path = model_path
 
             # Map COCO objects → pricing amenities
             self.amenity_map = {
@@ -68,45 +319,211 @@ class YOLOService:
                 "dining_room": ["dining table", "chair"],
             }
 
-            # Session storage for aggregating scan data
-            self.sessions = {}
+            # Session storage for aggregating scan data (compact: counters, the
+            # most recent frames, captured photos spilled to disk). Sessions live
+            # in the shared session store so any worker can serve them; the image
+            # directory must be shared by those workers too.
+            self.session_store = get_session_store()
+            self.recent_frames_per_session = int(os.getenv("YOLO_SESSION_RECENT_FRAMES", "20"))
+            self.session_ttl = float(os.getenv("YOLO_SESSION_TTL", "1800"))
+            self.image_dir = os.getenv("YOLO_SESSION_IMAGE_DIR") or os.path.join(
+                tempfile.gettempdir(), "vibe_scan_images"
+            )
+            os.makedirs(self.image_dir, exist_ok=True)
+
+            # Write-back: a session being scanned is owned by the worker serving its
+            # WebSocket, so per-frame updates stay here and reach the shared store
+            # every YOLO_SESSION_FLUSH_FRAMES frames (and on photo capture, finalize)
+            self.session_flush_frames = int(os.getenv("YOLO_SESSION_FLUSH_FRAMES", "10"))
+            self._open_sessions = {}  # session_id -> {"session", "unsaved", "touched"}
+
+            # Temporal smoothing: per-session EMA over class confidences and
+            # amenity presence; rooms are entered/left with hysteresis and
+            # counted per visit, so one noisy frame can't add a bedroom
+            self.smoothing_alpha = float(os.getenv("YOLO_SMOOTHING_ALPHA", "0.5"))
+            self.room_enter_threshold = float(os.getenv("YOLO_ROOM_ENTER", "0.5"))
+            self.room_exit_threshold = float(os.getenv("YOLO_ROOM_EXIT", "0.2"))
+            self.amenity_confirm_threshold = float(os.getenv("YOLO_AMENITY_CONFIRM", "0.6"))
+
+            # Class id -> name (same for every worker's copy of the model), plus
+            # id-indexed amenity/room tables so post-processing is array ops
+            self.class_names = self.model.names
+            self._build_lookup_tables()
+
+            # Micro-batching: frames from all sessions that arrive within the
+            # batch window are decoded and run through the model in one call,
+            # off the event loop
+            self.batch_window = float(os.getenv("YOLO_BATCH_WINDOW_MS", "5")) / 1000
+            self.max_batch_size = int(os.getenv("YOLO_MAX_BATCH_SIZE", "8"))
+
+            # Executor backend: "thread" (pinned torch threads; the shared model
+            # with one worker, one model per thread otherwise) or "process"
+            # (one model per worker process)
+            self.executor_backend = os.getenv("YOLO_EXECUTOR", "thread").lower()
+            self.inference_workers = int(os.getenv(
+                "YOLO_WORKERS", "2" if self.executor_backend == "process" else "1"
+            ))
+            # Empty (as in .env.example) means "use the default"
+            torch_threads = int(
+                os.getenv("YOLO_TORCH_THREADS") or max(1, (os.cpu_count() or 1) // self.inference_workers)
+            )
+
+            if self.executor_backend == "process":
+                self._inference_executor = ProcessPoolExecutor(
+                    max_workers=self.inference_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_process_worker,
+                    initargs=(model_path, torch_threads)
+                )
+            else:
+                _set_torch_threads(torch_threads)
+                self._inference_executor = ThreadPoolExecutor(
+                    max_workers=self.inference_workers, thread_name_prefix="yolo-infer"
+                )
+
+            # Motion gate: a frame whose thumbnail barely differs from the last
+            # inferred frame of the same session reuses that frame's detections
+            self.motion_threshold = float(os.getenv("YOLO_MOTION_THRESHOLD", "4"))  # mean abs diff (0-255), 0 disables
+            self.motion_max_reuse = int(os.getenv("YOLO_MOTION_MAX_REUSE", "10"))  # force a fresh pass after N reuses
+            self._motion_state = {}  # session_id -> {"thumbnail", "result", "reused", "frames", "skipped"}
+
+            # Thumbnails are decoded off the event loop, on their own threads so
+            # the gate never waits behind a running inference batch
+            self._thumbnail_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="yolo-gate")
+            self.gate_stats = {"frames": 0, "skipped": 0}
 
-            print(f"✅ YOLO service initialized with {model_path}")
+            self._frame_queue = None
+            self._batcher_task = None
+            self._batcher_loop = None
+            self.batch_stats = {"batches": 0, "frames": 0, "max_batch": 0}
+
+            print(f"✅ YOLO service initialized with {model_path} ({self.backend})")
 
         except Exception as e:
             print(f"❌ Error initializing YOLO: {e}")
             raise
 
+    @staticmethod
+    def is_valid_session_id(session_id: str) -> bool:
+        """Session ids are canonical UUID strings (anything else never names a session)"""
+        try:
+            return str(uuid.UUID(session_id)) == session_id
+        except (TypeError, ValueError, AttributeError):
+            return False
+
+    def _session_dir(self, session_id: str) -> str:
+        """Photo directory of a session; refuses ids that could escape image_dir"""
+        if not self.is_valid_session_id(session_id):
+            raise ValueError(f"Invalid scan session id: {session_id!r}")
+        return os.path.join(self.image_dir, session_id)
+
     def create_session(self, session_id: str = None) -> str:
         """Create a new scanning session"""
         if not session_id:
             session_id = str(uuid.uuid4())
+        elif not self.is_valid_session_id(session_id):
+            raise ValueError(f"Invalid scan session id: {session_id!r}")
 
-        self.sessions[session_id] = {
+        # JSON-serializable so it can live in any session store backend
+        self._save_session({
             "session_id": session_id,
             "created_at": datetime.now().isoformat(),
-            "frames": [],
-            "all_amenities": set(),
-            "all_objects": [],
-            "room_detections": Counter(),
+            "frames": [],  # Most recent frames only
+            "all_amenities": [],
+            "object_counts": {},
+            "room_detections": {},  # Room visits (see _track_rooms)
+            "room_frames": {},  # Raw per-frame room classifications
+            "tracker": {"class_ema": {}, "amenity_ema": {}, "current_room": None},
+            "summary": self._summarize_rooms({}),  # Running property inference
             "frame_count": 0,
-            "images": []  # Store images every 10 frames
-        }
+            "images": []  # Captured photo metadata; JPEG bytes live on disk under "path"
+        })
 
         return session_id
 
+    def _summarize_rooms(self, room_detections: Dict[str, int]) -> Dict[str, Any]:
+        """Room counts and property type inferred from them"""
+        bedrooms = room_detections.get("bedroom", 0)
+        bathrooms = room_detections.get("bathroom", 0)
+        has_kitchen = room_detections.get("kitchen", 0) > 0
+        has_living_room = room_detections.get("living_room", 0) > 0
+
+        if bedrooms >= 3 and bathrooms >= 2:
+            property_type = "Entire house"
+        elif bedrooms >= 2:
+            property_type = "Entire apartment"
+        elif bedrooms == 1 and has_kitchen:
+            property_type = "Studio apartment"
+        elif bedrooms == 1:
+            property_type = "Private room"
+        else:
+            property_type = "Property"
+
+        return {
+            "property_type": property_type,
+            "bedrooms": bedrooms,
+            "bathrooms": bathrooms,
+            "has_kitchen": has_kitchen,
+            "has_living_room": has_living_room
+        }
+
+    def _load_session(self, session_id: str) -> Dict[str, Any]:
+        """Fetch session state (this worker's unflushed copy first; None if missing/expired)"""
+        entry = self._open_sessions.get(session_id)
+        if entry is not None:
+            return entry["session"]
+        return self.session_store.get("yolo", session_id)
+
+    def _save_session(self, session: Dict[str, Any], flush: bool = True):
+        """
+        Write session state back to the shared store, refreshing its TTL
+
+        With flush=False the update is kept in this worker and only written
+        once session_flush_frames updates have accumulated.
+        """
+        session_id = session["session_id"]
+        entry = self._open_sessions.get(session_id)
+
+        if not flush:
+            if entry is None:
+                entry = self._open_sessions[session_id] = {"session": session, "unsaved": 0}
+            entry["session"] = session
+            entry["unsaved"] += 1
+            entry["touched"] = time.time()
+            if entry["unsaved"] < self.session_flush_frames:
+                return
+
+        if entry is not None:
+            entry["unsaved"] = 0
+            entry["touched"] = time.time()
+        self.session_store.set("yolo", session_id, session, self.session_ttl)
+
+    def flush_session(self, session_id: str):
+        """Write this worker's pending updates for a session to the shared store and release it"""
+        entry = self._open_sessions.pop(session_id, None)
+        if entry is not None and entry["unsaved"]:
+            self.session_store.set("yolo", session_id, entry["session"], self.session_ttl)
+
     def add_frame_to_session(
         self,
         session_id: str,
         detection_result: Dict[str, Any],
         image_base64: str = None,
-        store_image: bool = False
+        store_image: bool = False,
+        image_bytes: bytes = None
     ):
-        """Add frame detection to session"""
-        if session_id not in self.sessions:
-            return
+        """
+        Add frame detection to session
+
+        Captured photos (store_image) are written to disk; pass either a base64
+        data URI (image_base64) or the raw JPEG (image_bytes).
+
+        Returns the smoothed room the scanner is currently in (None between rooms).
+        """
+        session = self._load_session(session_id)
+        if session is None:
+            return None
 
-        session = self.sessions[session_id]
         session["frame_count"] += 1
 
         # Store frame data (lightweight - just detection results)
@@ -115,58 +532,178 @@ class YOLOService:
             "timestamp": datetime.now().isoformat(),
             "detection": detection_result
         })
+        del session["frames"][:-self.recent_frames_per_session]
+
+        # Smooth class confidences and amenity presence across frames
+        tracker = session["tracker"]
+        class_confidence = {}
+        for obj in detection_result.get("objects", []):
+            class_confidence[obj["class"]] = max(class_confidence.get(obj["class"], 0), obj["confidence"])
+        tracker["class_ema"] = self._ema(tracker["class_ema"], class_confidence)
+        tracker["amenity_ema"] = self._ema(
+            tracker["amenity_ema"], dict.fromkeys(detection_result.get("amenities", []), 1.0)
+        )
 
-        # Aggregate amenities
-        if detection_result.get("amenities"):
-            session["all_amenities"].update(detection_result["amenities"])
+        # Aggregate amenities (only once they've persisted across frames)
+        confirmed = [
+            amenity for amenity, score in tracker["amenity_ema"].items()
+            if score >= self.amenity_confirm_threshold
+        ]
+        if not set(confirmed).issubset(session["all_amenities"]):
+            session["all_amenities"] = sorted(set(session["all_amenities"]).union(confirmed))
 
         # Aggregate objects
-        if detection_result.get("objects"):
-            for obj in detection_result["objects"]:
-                session["all_objects"].append(obj["class"])
+        object_counts = session["object_counts"]
+        for obj in detection_result.get("objects", []):
+            object_counts[obj["class"]] = object_counts.get(obj["class"], 0) + 1
 
-        # Track room detections
+        # Track room detections (raw per frame) and room visits (smoothed)
         room_type = detection_result.get("room_type")
         if room_type and room_type != "general_space":
-            session["room_detections"][room_type] += 1
+            session["room_frames"][room_type] = session["room_frames"].get(room_type, 0) + 1
+
+        if self._track_rooms(session):
+            session["summary"] = self._summarize_rooms(session["room_detections"])
 
         # Store image ONLY when explicitly flagged (every 3 seconds from client)
-        if store_image and image_base64:
+        if store_image and (image_base64 or image_bytes is not None):
+            if image_bytes is None:
+                image_bytes = base64.b64decode(image_base64.split(",")[-1])
+
+            path = self._write_session_image(session_id, session["frame_count"], image_bytes)
             session["images"].append({
                 "frame_number": session["frame_count"],
                 "timestamp": datetime.now().isoformat(),
-                "image": image_base64,
+                "path": path,
                 "room_type": room_type,
                 "objects_detected": len(detection_result.get("objects", []))
             })
             print(f"📸 Photo captured! Total images: {len(session['images'])}")
 
-    def finalize_session(self, session_id: str) -> Dict[str, Any]:
-        """Get final aggregated results for session"""
-        if session_id not in self.sessions:
-            return {"error": "Session not found"}
+        # Photos are flushed right away so other workers can serve them
+        self._save_session(session, flush=store_image)
+        return tracker["current_room"]
 
-        session = self.sessions[session_id]
+    def _ema(self, previous: Dict[str, float], current: Dict[str, float]) -> Dict[str, float]:
+        """Exponential moving average per key (absent = 0); near-zero entries are dropped"""
+        alpha = self.smoothing_alpha
+        smoothed = {}
+        for key in previous.keys() | current.keys():
+            value = alpha * current.get(key, 0.0) + (1 - alpha) * previous.get(key, 0.0)
+            if value >= 0.01:
+                smoothed[key] = round(value, 4)
+        return smoothed
 
-        # Count unique objects
-        object_counts = Counter(session["all_objects"])
+    def _track_rooms(self, session: Dict[str, Any]) -> bool:
+        """
+        Update the session's current room from smoothed class confidences
 
-        # Determine property type from room counts
-        bedrooms = session["room_detections"].get("bedroom", 0)
-        bathrooms = session["room_detections"].get("bathroom", 0)
-        has_kitchen = session["room_detections"].get("kitchen", 0) > 0
-        has_living_room = session["room_detections"].get("living_room", 0) > 0
+        A room's score is the summed EMA confidence of its indicator objects.
+        The scanner enters a room when its score reaches the enter threshold,
+        and leaves when it drops below the exit threshold or another room beats
+        it by the hysteresis margin. Each entry counts as one visit in
+        room_detections. Returns True when a new visit was counted.
+        """
+        tracker = session["tracker"]
+        class_ema = tracker["class_ema"]
+        scores = {
+            room: sum(class_ema.get(obj, 0.0) for obj in indicators)
+            for room, indicators in self.room_indicators.items()
+        }
 
-        if bedrooms >= 3 and bathrooms >= 2:
-            property_type = "Entire house"
-        elif bedrooms >= 2:
-            property_type = "Entire apartment"
-        elif bedrooms == 1 and has_kitchen:
-            property_type = "Studio apartment"
-        elif bedrooms == 1:
-            property_type = "Private room"
-        else:
-            property_type = "Property"
+        current = tracker["current_room"]
+        if current and scores[current] < self.room_exit_threshold:
+            current = None
+
+        best = max(scores, key=scores.get)
+        margin = self.room_enter_threshold - self.room_exit_threshold
+        entered = (
+            best != current
+            and scores[best] >= self.room_enter_threshold
+            and (current is None or scores[best] >= scores[current] + margin)
+        )
+
+        if entered:
+            current = best
+            session["room_detections"][best] = session["room_detections"].get(best, 0) + 1
+
+        tracker["current_room"] = current
+        return entered
+
+    def _write_session_image(self, session_id: str, frame_number: int, image_bytes: bytes) -> str:
+        """Spill a captured JPEG to the session's image directory and return its path"""
+        session_dir = self._session_dir(session_id)
+        os.makedirs(session_dir, exist_ok=True)
+
+        path = os.path.join(session_dir, f"{frame_number:06d}.jpg")
+        with open(path, "wb") as f:
+            f.write(image_bytes)
+
+        return path
+
+    def _load_session_images(self, session: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Captured photos as data URIs (the format clients have always received)"""
+        images = []
+
+        for image in session["images"]:
+            try:
+                with open(image["path"], "rb") as f:
+                    data = base64.b64encode(f.read()).decode()
+            except OSError:
+                continue
+
+            images.append({
+                "frame_number": image["frame_number"],
+                "timestamp": image["timestamp"],
+                "image": f"data:image/jpeg;base64,{data}",
+                "room_type": image["room_type"],
+                "objects_detected": image["objects_detected"]
+            })
+
+        return images
+
+    def _image_references(self, session: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Captured photo metadata with a URL to stream each JPEG (see get_session_image_path)"""
+        return [
+            {
+                "frame_number": image["frame_number"],
+                "timestamp": image["timestamp"],
+                "url": f"/api/scan/image/{session['session_id']}/{image['frame_number']}",
+                "room_type": image["room_type"],
+                "objects_detected": image["objects_detected"]
+            }
+            for image in session["images"]
+        ]
+
+    def get_session_image_path(self, session_id: str, frame_number: int) -> str:
+        """Path of a captured photo on disk (None if the session or photo doesn't exist)"""
+        session = self._load_session(session_id)
+        if session is None:
+            return None
+
+        for image in session["images"]:
+            if image["frame_number"] == frame_number and os.path.exists(image["path"]):
+                return image["path"]
+        return None
+
+    def finalize_session(self, session_id: str, inline_images: bool = True) -> Dict[str, Any]:
+        """
+        Get final aggregated results for session
+
+        Object/room counts and the property type are running aggregates kept by
+        add_frame_to_session, so this doesn't depend on how many frames were
+        scanned. With inline_images=False photos are returned as URLs instead
+        of base64 data URIs.
+        """
+        # Scan is over: publish this worker's pending updates
+        self.flush_session(session_id)
+
+        session = self._load_session(session_id)
+        if session is None:
+            return {"error": "Session not found"}
+
+        # The motion gate no longer needs the last frame
+        self._motion_state.pop(session_id, None)
 
         # Build final result
         result = {
@@ -176,47 +713,100 @@ class YOLOService:
             "summary": {
                 "total_frames_processed": session["frame_count"],
                 "images_captured": len(session["images"]),
-                "property_type": property_type,
-                "bedrooms": bedrooms,
-                "bathrooms": bathrooms,
-                "has_kitchen": has_kitchen,
-                "has_living_room": has_living_room
+                **session["summary"]
             },
-            "amenities": sorted(list(session["all_amenities"])),
-            "objects_detected": dict(object_counts.most_common(20)),
-            "room_breakdown": dict(session["room_detections"]),
-            "images": session["images"],
-            "all_frames": session["frames"][-20:]  # Last 20 frames for reference
+            "amenities": session["all_amenities"],
+            "objects_detected": dict(Counter(session["object_counts"]).most_common(20)),
+            "room_breakdown": session["room_detections"],  # Visits per room type
+            "room_frames": session["room_frames"],
+            "images": self._load_session_images(session) if inline_images else self._image_references(session),
+            "all_frames": session["frames"]  # Last N frames for reference
         }
 
         return result
 
     def get_session(self, session_id: str) -> Dict[str, Any]:
         """Get current session data"""
-        if session_id not in self.sessions:
+        session = self._load_session(session_id)
+        if session is None:
             return {"error": "Session not found"}
 
-        session = self.sessions[session_id]
         return {
             "session_id": session_id,
             "frame_count": session["frame_count"],
-            "amenities": list(session["all_amenities"]),
+            "amenities": session["all_amenities"],
             "room_detections": dict(session["room_detections"]),
             "images_captured": len(session["images"])
         }
 
+    def touch_session(self, session_id: str) -> bool:
+        """Restart a session's TTL (keeps its photo URLs servable); False if it's gone"""
+        session = self._load_session(session_id)
+        if session is None:
+            return False
+
+        self._save_session(session)
+        return True
+
     def delete_session(self, session_id: str):
-        """Clean up session data"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        """Clean up session data (including captured photos on disk)"""
+        self._open_sessions.pop(session_id, None)
+        self.session_store.delete("yolo", session_id)
+        self._motion_state.pop(session_id, None)
+        if self.is_valid_session_id(session_id):
+            shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def reap_idle_sessions(self) -> int:
+        """
+        Drop sessions idle for longer than the session TTL; returns how many were reaped
+
+        The store expires session state itself; this purges it (for backends
+        that need it) and removes photo directories left behind by expired
+        sessions, whichever worker created them.
+        """
+        reaped = self.session_store.purge_expired()
+
+        cutoff = time.time() - self.session_ttl
+        for session_id, entry in list(self._open_sessions.items()):
+            if entry["touched"] < cutoff:
+                self._open_sessions.pop(session_id, None)
+
+        for session_id in list(self._motion_state):
+            if self._load_session(session_id) is None:
+                del self._motion_state[session_id]
+
+        for session_id in os.listdir(self.image_dir):
+            if not self.is_valid_session_id(session_id):
+                continue  # Not a session directory
+            session_dir = self._session_dir(session_id)
+            try:
+                idle = os.path.getmtime(session_dir) < cutoff
+            except OSError:
+                continue
+
+            if idle and self._load_session(session_id) is None:
+                shutil.rmtree(session_dir, ignore_errors=True)
+                reaped += 1
+
+        if reaped:
+            print(f"🧹 Reaped {reaped} idle scan session(s)")
+
+        return reaped
 
     async def detect_realtime(
         self,
-        image_bytes: bytes
+        image_bytes: bytes,
+        session_id: str = None
     ) -> Dict[str, Any]:
         """
         Fast real-time detection for streaming video frames
 
+        Args:
+            image_bytes: Encoded JPEG (bytes or memoryview - decoded without copying)
+            session_id: Scan session the frame belongs to; enables the motion gate,
+                which returns the previous detections ("reused": True) when the
+                scene hasn't changed
+
         Returns:
             {
                 "objects": [{"class": "bed", "confidence": 0.92, "bbox": [x1,y1,x2,y2]}, ...],
@@ -226,58 +816,101 @@ class YOLOService:
                 "stats": {"total_objects": 5, "confidence_avg": 0.85}
             }
         """
-        try:
-            # Decode image
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        thumbnail = None
+        if session_id and self.motion_threshold > 0:
+            thumbnail = await asyncio.get_running_loop().run_in_executor(
+                self._thumbnail_executor, _frame_thumbnail, image_bytes
+            )
+            reused = self._reuse_if_static(session_id, thumbnail)
+            if reused is not None:
+                return reused
 
-            if image is None:
-                return self._error_response("Invalid image data")
+        result = await self._detect(image_bytes)
+
+        if thumbnail is not None and result.get("success"):
+            state = self._motion_state.setdefault(session_id, {"frames": 1, "skipped": 0})
+            state.update({"thumbnail": thumbnail, "result": result, "reused": 0})
+
+        return result
+
+    def _reuse_if_static(self, session_id: str, thumbnail: np.ndarray) -> Dict[str, Any]:
+        """Previous detections for the session if this frame shows the same view, else None"""
+        self.gate_stats["frames"] += 1
+        state = self._motion_state.get(session_id)
+        if state is None:
+            return None
+        state["frames"] += 1
+
+        if thumbnail is None or "thumbnail" not in state or state["reused"] >= self.motion_max_reuse:
+            return None
+
+        # Compare with the last *inferred* frame so slow pans can't drift past the gate
+        if np.abs(thumbnail - state["thumbnail"]).mean() > self.motion_threshold:
+            return None
 
-            # Run YOLO detection
-            results = self.model(image, conf=self.confidence_threshold, verbose=False)[0]
+        state["reused"] += 1
+        state["skipped"] += 1
+        self.gate_stats["skipped"] += 1
+        return {**state["result"], "reused": True}
 
-            # Extract detections
-            objects = []
-            detected_classes = []
+    def get_gate_stats(self, session_id: str = None) -> Dict[str, Any]:
+        """Frames seen / skipped by the motion gate (process-wide, or for one live session)"""
+        stats = self.gate_stats
+        if session_id is not None:
+            state = self._motion_state.get(session_id, {})
+            stats = {"frames": state.get("frames", 0), "skipped": state.get("skipped", 0)}
 
-            for box in results.boxes:
-                cls_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-                class_name = results.names[cls_id]
+        return {
+            **stats,
+            "skip_rate": round(stats["skipped"] / stats["frames"], 3) if stats["frames"] else 0.0
+        }
+
+    async def _detect(self, image_bytes) -> Dict[str, Any]:
+        """Run a full YOLO pass on one frame and build the detection response"""
+        try:
+            # Decode + run YOLO detection off the event loop (batched with other sessions' frames)
+            detections = await self._infer(image_bytes)
 
-                # Bounding box coordinates
-                x1, y1, x2, y2 = [int(coord) for coord in box.xyxy[0].tolist()]
+            if detections is None:
+                return self._error_response("Invalid image data")
 
-                objects.append({
-                    "class": class_name,
-                    "confidence": round(confidence, 2),
-                    "bbox": [x1, y1, x2, y2]
-                })
+            # Extract detections (whole arrays at once, no per-box conversions)
+            cls_ids = detections["cls"]
+            confidences = np.round(detections["conf"].astype(np.float64), 2).tolist()
+            objects = [
+                {"class": class_name, "confidence": confidence, "bbox": bbox}
+                for class_name, confidence, bbox in zip(
+                    self._names_by_id[cls_ids].tolist(),
+                    confidences,
+                    detections["xyxy"].astype(np.int64).tolist()
+                )
+            ]
 
-                detected_classes.append(class_name)
+            # Per-class counts drive amenities and room type via the lookup tables
+            class_counts = np.bincount(cls_ids, minlength=len(self._names_by_id))
 
             # Extract amenities for pricing
-            amenities = self._extract_amenities(detected_classes)
+            amenities = self._extract_amenities(class_counts)
 
             # Infer room type
-            room_type = self._infer_room_type(set(detected_classes))
+            room_type = self._infer_room_type(class_counts)
 
             # Generate user guidance
             guidance = self._generate_guidance(room_type, len(objects))
 
             # Stats
-            avg_conf = sum(obj["confidence"] for obj in objects) / len(objects) if objects else 0
+            avg_conf = sum(confidences) / len(confidences) if confidences else 0
 
             return {
                 "success": True,
+                "reused": False,
                 "objects": objects,
-                "amenities": sorted(list(set(amenities))),
+                "amenities": amenities,
                 "room_type": room_type,
                 "guidance": guidance,
                 "stats": {
                     "total_objects": len(objects),
-                    "unique_objects": len(set(detected_classes)),
+                    "unique_objects": int(np.count_nonzero(class_counts)),
                     "confidence_avg": round(avg_conf, 2)
                 }
             }
@@ -285,47 +918,161 @@ class YOLOService:
         except Exception as e:
             return self._error_response(str(e))
 
-    def _extract_amenities(self, detected_classes: List[str]) -> List[str]:
+    async def _infer(self, image_bytes) -> Dict[str, np.ndarray]:
+        """Queue an encoded frame for the next inference batch and wait for its detections"""
+        loop = asyncio.get_running_loop()
+
+        # (Re)start the batcher on the current event loop
+        if self._batcher_loop is not loop or self._batcher_task is None or self._batcher_task.done():
+            self._frame_queue = asyncio.Queue()
+            self._batcher_loop = loop
+            self._batcher_task = loop.create_task(self._batch_worker())
+
+        # Worker processes can't receive memoryviews
+        if self.executor_backend == "process" and not isinstance(image_bytes, bytes):
+            image_bytes = bytes(image_bytes)
+
+        future = loop.create_future()
+        await self._frame_queue.put((image_bytes, future))
+        return await future
+
+    async def _batch_worker(self):
         """
-        Convert detected COCO objects to listing amenities
+        Form batches from queued frames and dispatch them to the executor
+
+        A batch is only formed once a worker is free, so frames that arrive
+        while every worker is busy are picked up together in the next batch.
         """
-        amenities = []
+        loop = asyncio.get_running_loop()
+        queue = self._frame_queue
+        free_workers = asyncio.Semaphore(self.inference_workers)
 
-        for obj_class in detected_classes:
-            if obj_class in self.amenity_map:
-                amenities.extend(self.amenity_map[obj_class])
+        while True:
+            await free_workers.acquire()
 
-        # Count-based amenities
-        class_counts = Counter(detected_classes)
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already waiting, then linger briefly for stragglers
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
 
-        if class_counts["bed"] >= 2:
+            task = loop.create_task(self._run_batch(batch))
+            task.add_done_callback(lambda _: free_workers.release())
+
+    async def _run_batch(self, batch: List[Any]):
+        """Run one batch on the executor and resolve each frame's future"""
+        loop = asyncio.get_running_loop()
+        frames = [frame for frame, _ in batch]
+
+        try:
+            if self.executor_backend == "process":
+                results = await loop.run_in_executor(
+                    self._inference_executor, _predict_in_worker, frames, self.confidence_threshold, self.imgsz
+                )
+            elif self.inference_workers > 1:
+                results = await loop.run_in_executor(
+                    self._inference_executor, _predict_in_thread, self.model_path, frames,
+                    self.confidence_threshold, self.imgsz
+                )
+            else:
+                results = await loop.run_in_executor(
+                    self._inference_executor, _predict_frames, self.model, frames,
+                    self.confidence_threshold, self.imgsz
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batch_stats["batches"] += 1
+        self.batch_stats["frames"] += len(batch)
+        self.batch_stats["max_batch"] = max(self.batch_stats["max_batch"], len(batch))
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _build_lookup_tables(self):
+        """
+        Precompute class-id indexed tables from amenity_map / room_indicators
+
+        _amenity_table[class_id] marks the amenities that class implies and
+        _room_table[class_id] marks the rooms it indicates, so a frame's
+        amenities and room scores come from one boolean reduction each.
+        """
+        num_classes = max(self.class_names) + 1
+        name_to_id = {name: class_id for class_id, name in self.class_names.items()}
+
+        self._names_by_id = np.array(
+            [self.class_names.get(i, str(i)) for i in range(num_classes)], dtype=object
+        )
+
+        self._amenity_names = sorted({a for amenities in self.amenity_map.values() for a in amenities})
+        amenity_index = {amenity: i for i, amenity in enumerate(self._amenity_names)}
+        self._amenity_table = np.zeros((num_classes, len(self._amenity_names)), dtype=bool)
+        for class_name, amenities in self.amenity_map.items():
+            if class_name in name_to_id:
+                self._amenity_table[name_to_id[class_name], [amenity_index[a] for a in amenities]] = True
+
+        self._room_names = list(self.room_indicators)
+        self._room_table = np.zeros((num_classes, len(self._room_names)), dtype=np.int32)
+        for room_index, indicators in enumerate(self.room_indicators.values()):
+            for class_name in indicators:
+                if class_name in name_to_id:
+                    self._room_table[name_to_id[class_name], room_index] = 1
+
+        # Ids used by the count/combination rules (-1 = class not in this model)
+        self._rule_class_ids = {
+            name: name_to_id.get(name, -1) for name in ("bed", "chair", "couch", "tv", "desk")
+        }
+
+    def _extract_amenities(self, class_counts: np.ndarray) -> List[str]:
+        """
+        Convert detected COCO objects (per-class counts) to sorted listing amenities
+        """
+        present = class_counts > 0
+        amenity_mask = self._amenity_table[present].any(axis=0)
+        amenities = [self._amenity_names[i] for i in np.flatnonzero(amenity_mask)]
+
+        def count(class_name: str) -> int:
+            class_id = self._rule_class_ids[class_name]
+            return int(class_counts[class_id]) if class_id >= 0 else 0
+
+        # Count-based amenities
+        if count("bed") >= 2:
             amenities.append("multiple bedrooms")
 
-        if class_counts["chair"] >= 4:
+        if count("chair") >= 4:
             amenities.append("dining area (seats 4+)")
 
         # Combination amenities
-        if "couch" in detected_classes and "tv" in detected_classes:
+        if count("couch") and count("tv"):
             amenities.append("entertainment center")
 
-        if "desk" in detected_classes and "chair" in detected_classes:
+        if count("desk") and count("chair"):
             amenities.append("home office")
 
-        return amenities
+        return sorted(set(amenities))
 
-    def _infer_room_type(self, detected_classes: Set[str]) -> str:
+    def _infer_room_type(self, class_counts: np.ndarray) -> str:
         """
-        Infer room type from detected objects
+        Infer room type from detected objects (room with the most distinct indicators)
         """
-        room_scores = {}
-
-        for room_type, indicators in self.room_indicators.items():
-            matches = sum(1 for obj in indicators if obj in detected_classes)
-            if matches > 0:
-                room_scores[room_type] = matches
+        room_scores = self._room_table[class_counts > 0].sum(axis=0)
 
-        if room_scores:
-            return max(room_scores, key=room_scores.get)
+        if room_scores.size and room_scores.max() > 0:
+            return self._room_names[int(np.argmax(room_scores))]
 
         return "general_space"
 
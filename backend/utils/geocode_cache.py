@@ -0,0 +1,128 @@
+"""
+Two-tier geocoding cache (in-memory LRU + SQLite on disk)
+
+Geocoding results are keyed by provider and the normalized location string.
+Found locations are kept for GEOCODE_CACHE_TTL; "no such place" answers are
+cached too (negative caching) but only for GEOCODE_NEGATIVE_TTL, so a typo
+doesn't hit the API again on every request and a real miss heals quickly.
+"""
+
+import os
+import re
+import asyncio
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from utils.ttl_cache import TTLCache
+
+
+def normalize_location(location: str) -> str:
+    """Case/whitespace/punctuation-insensitive form of a location string"""
+    text = re.sub(r"\s+", " ", location.strip().lower())
+    text = re.sub(r"\s*,\s*", ", ", text)
+    return text.strip(" ,.")
+
+
+class GeocodeCache:
+    """Memory LRU in front of a SQLite store; both honour per-entry expiry"""
+
+    def __init__(self, path: str = None, memory_size: int = None, ttl_seconds: float = None, negative_ttl_seconds: float = None):
+        self.path = path or os.getenv(
+            "GEOCODE_CACHE_PATH",
+            os.path.join(tempfile.gettempdir(), "vibe_geocode_cache.sqlite3")
+        )
+        self.ttl_seconds = ttl_seconds or float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+        self.negative_ttl_seconds = negative_ttl_seconds or float(os.getenv("GEOCODE_NEGATIVE_TTL", "3600"))
+
+        # Values are {"result": geo_data_or_None} so a cached miss isn't a cache miss
+        self.memory = TTLCache(
+            max_size=memory_size or int(os.getenv("GEOCODE_CACHE_SIZE", "1024")),
+            ttl_seconds=self.ttl_seconds
+        )
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS geocode_results (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("DELETE FROM geocode_results WHERE expires_at < ?", (time.time(),))
+        self._db.commit()
+
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Look up a location
+
+        Returns (found, result): found is False on a cache miss; result is None
+        for a cached negative answer.
+        """
+        entry = self.memory.get(key)
+
+        if entry is None:
+            entry = await asyncio.to_thread(self._get_from_disk, key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.disk_hits += 1
+
+        if entry["result"] is None:
+            self.negative_hits += 1
+        return True, entry["result"]
+
+    async def set(self, key: str, result: Optional[Dict[str, Any]]):
+        """Cache a geocoding result (None = location not found, kept briefly)"""
+        ttl = self.ttl_seconds if result is not None else self.negative_ttl_seconds
+        self.memory.set(key, {"result": result}, ttl_seconds=ttl)
+        await asyncio.to_thread(self._set_on_disk, key, result, ttl)
+
+    def _get_from_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM geocode_results WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        # Promote to memory for the rest of its lifetime
+        entry = {"result": json.loads(row[0]) if row[0] is not None else None}
+        self.memory.set(key, entry, ttl_seconds=row[1] - time.time())
+        return entry
+
+    def _set_on_disk(self, key: str, result: Optional[Dict[str, Any]], ttl: float):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geocode_results (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result) if result is not None else None, time.time() + ttl)
+            )
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per tier"""
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM geocode_results").fetchone()[0]
+
+        memory_hits = self.memory.hits
+        lookups = memory_hits + self.disk_hits + self.misses
+        return {
+            "lookups": lookups,
+            "memory_hits": memory_hits,
+            "disk_hits": self.disk_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": round((memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "memory_entries": self.memory.stats()["size"],
+            "disk_entries": disk_entries,
+        }
@@ -0,0 +1,127 @@
+"""
+Shared async LLM clients (Claude + Groq)
+
+All services call Claude and Groq through one async client each, so LLM round
+trips never block the event loop. Calls are bounded by a concurrency semaphore
+so one busy feature can't exhaust rate limits for everyone else.
+
+Usage:
+    self.client = get_claude_client()
+    message = await self.client.messages.create(model=..., max_tokens=..., messages=[...])
+
+    self.groq_client = get_groq_client()
+    response = await self.groq_client.chat.completions.create(model=..., messages=[...])
+"""
+
+import os
+import asyncio
+import httpx
+from typing import Any, Callable, Dict
+from anthropic import AsyncAnthropic
+from groq import AsyncGroq
+
+
+class _Messages:
+    """Drop-in for AsyncAnthropic.messages that bounds in-flight calls per model"""
+
+    def __init__(self, client: "AsyncClaudeClient"):
+        self._client = client
+
+    async def create(self, **kwargs) -> Any:
+        semaphore = self._client.semaphore_for(kwargs.get("model", "default"))
+        async with semaphore:
+            return await self._client.anthropic.messages.create(**kwargs)
+
+
+class AsyncClaudeClient:
+    """AsyncAnthropic wrapper with a per-model concurrency semaphore"""
+
+    def __init__(self, api_key: str = None, max_concurrency: int = None):
+        self.anthropic = AsyncAnthropic(api_key=api_key or os.getenv("ANTHROPIC_API_KEY"))
+        self.max_concurrency = max_concurrency or int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8"))
+        self.messages = _Messages(self)
+
+        # model -> asyncio.Semaphore, created lazily on first use
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def semaphore_for(self, model: str) -> asyncio.Semaphore:
+        """Get (or create) the concurrency limit for a model"""
+        if model not in self._semaphores:
+            self._semaphores[model] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[model]
+
+
+# Singleton instance, shared by every service in the process
+_claude_client = None
+
+def get_claude_client() -> AsyncClaudeClient:
+    """Get or create AsyncClaudeClient singleton"""
+    global _claude_client
+    if _claude_client is None:
+        _claude_client = AsyncClaudeClient()
+    return _claude_client
+
+
+class _Bounded:
+    """Wraps an async SDK create() so every call holds the client's semaphore"""
+
+    def __init__(self, create: Callable, semaphore: asyncio.Semaphore):
+        self._create = create
+        self._semaphore = semaphore
+
+    async def create(self, **kwargs) -> Any:
+        async with self._semaphore:
+            return await self._create(**kwargs)
+
+
+class _Namespace:
+    """Attribute container mirroring the SDK layout (client.chat.completions)"""
+
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class AsyncGroqClient:
+    """
+    AsyncGroq wrapper with a pooled HTTP connection, default timeout and a
+    concurrency semaphore
+
+    Exposes chat.completions.create and audio.transcriptions.create with the
+    same arguments as the Groq SDK; pass timeout=... to override per call.
+    """
+
+    def __init__(self, api_key: str = None, max_concurrency: int = None, timeout: float = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("GROQ_MAX_CONCURRENCY", "16"))
+        self.timeout = timeout or float(os.getenv("GROQ_TIMEOUT", "30"))
+
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            ),
+            timeout=self.timeout
+        )
+        self.groq = AsyncGroq(
+            api_key=api_key or os.getenv("GROQ_API_KEY"),
+            http_client=self.http_client,
+            timeout=self.timeout
+        )
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.chat = _Namespace(
+            completions=_Bounded(self.groq.chat.completions.create, self._semaphore)
+        )
+        self.audio = _Namespace(
+            transcriptions=_Bounded(self.groq.audio.transcriptions.create, self._semaphore)
+        )
+
+
+# Singleton instance, shared by every service in the process
+_groq_client = None
+
+def get_groq_client() -> AsyncGroqClient:
+    """Get or create AsyncGroqClient singleton"""
+    global _groq_client
+    if _groq_client is None:
+        _groq_client = AsyncGroqClient()
+    return _groq_client
@@ -0,0 +1,174 @@
+"""
+Pluggable key/value store for scan-session state
+
+Scan sessions and temporary scan results must be visible to every uvicorn
+worker, so they live behind this small interface instead of process-local
+dicts. Pick the backend with SCAN_SESSION_BACKEND:
+
+    memory  - process-local dict (default; single worker only)
+    sqlite  - shared SQLite file (SCAN_SESSION_SQLITE_PATH); all workers on one host
+    redis   - any Redis-compatible server (SCAN_SESSION_REDIS_URL); multiple hosts
+
+Values are JSON-serializable dicts. Every entry carries a TTL that is
+refreshed on each write, so abandoned sessions expire on their own.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class MemorySessionStore:
+    """Process-local store (values are kept as-is, not serialized)"""
+
+    backend = "memory"
+
+    def __init__(self):
+        # (namespace, key) -> (expires_at, value)
+        self._entries: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Return a live value, or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[(namespace, key)]
+                return None
+            return entry[1]
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: float):
+        """Store a value, (re)starting its TTL"""
+        with self._lock:
+            self._entries[(namespace, key)] = (time.time() + ttl_seconds, value)
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def purge_expired(self) -> int:
+        """Drop expired entries; returns how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (expires_at, _) in self._entries.items() if expires_at < now]
+            for k in expired:
+                del self._entries[k]
+        return len(expired)
+
+
+class SQLiteSessionStore:
+    """Store shared through a SQLite file (safe across worker processes on one host)"""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv(
+            "SCAN_SESSION_SQLITE_PATH",
+            os.path.join(tempfile.gettempdir(), "vibe_scan_sessions.sqlite3")
+        )
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS scan_sessions (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._db.commit()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM scan_sessions WHERE namespace = ? AND key = ? AND expires_at >= ?",
+                (namespace, key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: float):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO scan_sessions (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), time.time() + ttl_seconds)
+            )
+            self._db.commit()
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM scan_sessions WHERE namespace = ? AND key = ?", (namespace, key)
+            )
+            self._db.commit()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM scan_sessions WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+        return cursor.rowcount
+
+
+class RedisSessionStore:
+    """Store on a Redis-compatible server (Redis, Valkey, KeyDB, ...) using native key expiry"""
+
+    backend = "redis"
+
+    def __init__(self, url: str = None, prefix: str = None):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("SCAN_SESSION_BACKEND=redis requires the 'redis' package (pip install redis)")
+
+        self.url = url or os.getenv("SCAN_SESSION_REDIS_URL", "redis://localhost:6379/0")
+        self.prefix = prefix or os.getenv("SCAN_SESSION_REDIS_PREFIX", "vibe:scan")
+        self._redis = redis.Redis.from_url(self.url)
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        value = self._redis.get(self._key(namespace, key))
+        return json.loads(value) if value is not None else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: float):
+        self._redis.set(self._key(namespace, key), json.dumps(value), px=int(ttl_seconds * 1000))
+
+    def delete(self, namespace: str, key: str):
+        self._redis.delete(self._key(namespace, key))
+
+    def purge_expired(self) -> int:
+        # Redis expires keys itself
+        return 0
+
+
+# Singleton instance, shared by the YOLO session API and the temp-scan endpoints
+_session_store = None
+
+def get_session_store():
+    """Get or create the session store selected by SCAN_SESSION_BACKEND"""
+    global _session_store
+    if _session_store is None:
+        backend = os.getenv("SCAN_SESSION_BACKEND", "memory").lower()
+
+        if backend == "sqlite":
+            _session_store = SQLiteSessionStore()
+        elif backend == "redis":
+            _session_store = RedisSessionStore()
+        else:
+            _session_store = MemorySessionStore()
+
+        print(f"✅ Scan session store: {_session_store.backend}")
+    return _session_store
@@ -0,0 +1,190 @@
+"""
+Content-addressed cache for Claude Vision photo analyses
+
+Results are keyed by the image content (SHA-256 of base64 data, or URL + ETag /
+Last-Modified for remote photos) plus a prompt version, and stored in a local
+SQLite file with least-recently-used eviction once the store exceeds its size
+budget. Re-analyzing an unchanged photo costs zero LLM calls.
+
+A URL without a validator (no ETag / Last-Modified, HEAD failed, or not
+checked at all on latency-sensitive paths) can't detect a changed image, so
+analyses keyed on it expire after VISION_CACHE_URL_TTL. Validators are
+remembered for VISION_CACHE_VALIDATOR_TTL so repeat analyses skip the HEAD.
+SQLite reads and writes run on a worker thread, off the event loop.
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import httpx
+from typing import Any, Dict, List, Optional
+
+from utils.ttl_cache import TTLCache
+
+
+class VisionCache:
+    """SQLite-backed vision result cache with size-based LRU eviction"""
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path = path or os.getenv(
+            "VISION_CACHE_PATH",
+            os.path.join(tempfile.gettempdir(), "vibe_vision_cache.sqlite3")
+        )
+        self.max_bytes = max_bytes or int(float(os.getenv("VISION_CACHE_MAX_MB", "50")) * 1024 * 1024)
+        self.url_ttl = float(os.getenv("VISION_CACHE_URL_TTL", "3600"))
+        self.head_timeout = float(os.getenv("VISION_CACHE_HEAD_TIMEOUT", "1.0"))
+
+        # URL -> ETag / Last-Modified ("" when the server sent neither)
+        self.validators = TTLCache(
+            max_size=4096, ttl_seconds=float(os.getenv("VISION_CACHE_VALIDATOR_TTL", "300"))
+        )
+        self._http_client = None
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS vision_results (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                expires_at REAL
+            )"""
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS vision_results_lru ON vision_results (last_access)"
+        )
+        self._db.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    async def photo_key(self, photo: str, validate: bool = True) -> str:
+        """
+        Content identity for a photo
+
+        Base64 photos hash their data. URLs use a HEAD request's ETag or
+        Last-Modified (remembered per URL) so the key changes when the remote
+        image does. validate=False skips the HEAD entirely for latency-sensitive
+        callers; like a URL without validators, the key is then time-limited.
+        """
+        if not photo.startswith("http"):
+            return "sha256:" + hashlib.sha256(photo.encode()).hexdigest()
+
+        version = self.validators.get(photo) if validate else ""
+        if version is None:
+            version = ""
+            try:
+                if self._http_client is None:
+                    self._http_client = httpx.AsyncClient(timeout=self.head_timeout, follow_redirects=True)
+                response = await self._http_client.head(photo)
+                version = response.headers.get("etag") or response.headers.get("last-modified") or ""
+            except Exception:
+                pass
+            self.validators.set(photo, version)
+
+        return f"url:{photo}#{version}"
+
+    def ttl_for(self, photo_keys: List[str]) -> Optional[float]:
+        """Expiry for an analysis of these photos: url_ttl if any can't be validated, else None"""
+        # URL keys end in "#" when there was no validator
+        if any(key.startswith("url:") and key.endswith("#") for key in photo_keys):
+            return self.url_ttl
+        return None
+
+    def make_key(self, namespace: str, prompt_version: str, photo_keys: List[str], **params) -> str:
+        """Cache key for an analysis of one or more photos with a given prompt version"""
+        material = json.dumps(
+            [namespace, prompt_version, photo_keys, params], sort_keys=True
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return a cached, unexpired analysis result, or None"""
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Store an analysis result (expiring after ttl_seconds if given)"""
+        await asyncio.to_thread(self._set, key, value, ttl_seconds)
+
+    def _get(self, key: str) -> Optional[Any]:
+        now = time.time()
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM vision_results WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (key, now)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._db.execute(
+                "UPDATE vision_results SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Any, ttl_seconds: Optional[float]):
+        """Insert a result, dropping expired entries and evicting LRU entries over budget"""
+        payload = json.dumps(value)
+        now = time.time()
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO vision_results (key, value, size, last_access, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now + ttl_seconds if ttl_seconds else None)
+            )
+            self._db.execute("DELETE FROM vision_results WHERE expires_at < ?", (now,))
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop oldest entries until the store fits in max_bytes (caller holds the lock)"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM vision_results").fetchone()[0]
+
+        while total > self.max_bytes:
+            row = self._db.execute(
+                "SELECT key, size FROM vision_results ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM vision_results WHERE key = ?", (row[0],))
+            total -= row[1]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and store size"""
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM vision_results"
+            ).fetchone()
+
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Singleton instance, shared by every vision-using service in the process
+_vision_cache = None
+
+def get_vision_cache() -> VisionCache:
+    """Get or create VisionCache singleton"""
+    global _vision_cache
+    if _vision_cache is None:
+        _vision_cache = VisionCache()
+    return _vision_cache